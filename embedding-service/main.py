@@ -14,29 +14,40 @@ Backends:
 from __future__ import annotations
 
 import argparse
+import contextlib
 import hashlib
-import json
 import logging
-import math
 import os
+import queue
 import signal
 import sys
 import threading
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from functools import lru_cache
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from typing import Any, Protocol, Sequence
+from typing import Any, Iterator, Protocol, Sequence
+
+import numpy as np
+import orjson
 
 DEFAULT_HOST = "0.0.0.0"
 DEFAULT_PORT = 8844
 DEFAULT_MODEL_NAME = "Qwen/Qwen3-Embedding-8B"
 DEFAULT_MODEL_KEY = "Qwen3-Embedding-8B"
-DEFAULT_DTYPE = "float16"
+DEFAULT_DTYPE = "auto"
 DEFAULT_BACKEND = "transformers"
 DEFAULT_MAX_LENGTH = 512
 DEFAULT_MAX_ITEMS = 64
 DEFAULT_MAX_BODY_BYTES = 2_000_000
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_BATCH_WINDOW_MS = 5
+DEFAULT_CUDA_STREAMS = 1
+# Texts whose token counts differ by at most this much share one padded batch.
+LENGTH_BUCKET_TOLERANCE = 32
 PIPELINE_VECTOR_DIMENSIONS = 4096
 
 
@@ -57,6 +68,17 @@ def _env_int(name: str, fallback: int) -> int:
         return fallback
 
 
+def _env_bool(name: str, fallback: bool) -> bool:
+    raw = os.getenv(name, "").strip().lower()
+    if raw == "":
+        return fallback
+    return raw in ("1", "true", "yes", "on")
+
+
+def _text_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
 @dataclass(frozen=True)
 class Settings:
     host: str = DEFAULT_HOST
@@ -65,17 +87,22 @@ class Settings:
     model_name: str = DEFAULT_MODEL_NAME
     model_key: str = DEFAULT_MODEL_KEY
     dtype: str = DEFAULT_DTYPE
+    int8: bool = False
     max_length: int = DEFAULT_MAX_LENGTH
     max_items: int = DEFAULT_MAX_ITEMS
     max_body_bytes: int = DEFAULT_MAX_BODY_BYTES
+    cache_size: int = DEFAULT_CACHE_SIZE
+    batch_window_ms: int = DEFAULT_BATCH_WINDOW_MS
+    cuda_streams: int = DEFAULT_CUDA_STREAMS
     log_level: str = "INFO"
 
 
 class EmbeddingBackend(Protocol):
+    # embed returns a C-contiguous (len(texts), dimensions) float32 matrix.
     name: str
     dimensions: int
 
-    def embed(self, texts: Sequence[str], *, max_length: int) -> list[list[float]]:
+    def embed(self, texts: Sequence[str], *, max_length: int) -> np.ndarray:
         raise NotImplementedError
 
     def health(self) -> dict[str, Any]:
@@ -86,12 +113,31 @@ class DeterministicBackend:
     name = "deterministic"
     dimensions = PIPELINE_VECTOR_DIMENSIONS
 
-    def __init__(self, model_name: str) -> None:
+    def __init__(self, model_name: str, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
         self.model_name = model_name
+        # Two bytes per dimension: 8192 for the fixed 4096-d pipeline contract.
+        self._row_bytes = self.dimensions * 2
+        # Raw rows are keyed by a 128-bit content digest so repeated texts skip
+        # generation entirely; maxsize=0 disables caching.
+        self._cached_row = lru_cache(maxsize=max(0, cache_size))(self._row_for_digest)
 
-    def embed(self, texts: Sequence[str], *, max_length: int) -> list[list[float]]:
+    def embed(self, texts: Sequence[str], *, max_length: int) -> np.ndarray:
         _ = max_length
-        return [self._vector_for_text(text) for text in texts]
+        vectors = np.empty((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row] = self._cached_row(_text_digest(text))
+
+        # Each uint16 maps to [-1, 1], then every row is L2-normalized in one pass.
+        # einsum reduces the squares without materializing a vectors**2 temporary.
+        vectors *= 1.0 / 32767.5
+        vectors -= 1.0
+        norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))[:, np.newaxis]
+        zero_rows = norms[:, 0] == 0
+        if zero_rows.any():
+            vectors[zero_rows, 0] = 1.0
+            norms[zero_rows] = 1.0
+        vectors /= norms
+        return vectors
 
     def health(self) -> dict[str, Any]:
         return {
@@ -101,39 +147,42 @@ class DeterministicBackend:
             "dimensions": self.dimensions,
         }
 
-    def _vector_for_text(self, text: str) -> list[float]:
-        values: list[float] = []
-        counter = 0
-        while len(values) < self.dimensions:
-            digest = hashlib.sha256(f"{text}\n{counter}".encode("utf-8")).digest()
-            for idx in range(0, len(digest), 2):
-                pair = digest[idx : idx + 2]
-                if len(pair) < 2:
-                    pair = pair + b"\x00"
-                raw = int.from_bytes(pair, byteorder="little", signed=False)
-                value = (raw / 32767.5) - 1.0
-                values.append(value)
-                if len(values) >= self.dimensions:
-                    break
-            counter += 1
-
-        norm = math.sqrt(sum(value * value for value in values))
-        if norm == 0:
-            values[0] = 1.0
-            norm = 1.0
-        return [value / norm for value in values]
+    def _row_for_digest(self, digest: bytes) -> np.ndarray:
+        # One XOF call yields all 2*dimensions bytes, read as little-endian uint16.
+        # frombuffer over bytes is read-only, so cached rows are safe to share.
+        stream = hashlib.shake_128(digest).digest(self._row_bytes)
+        return np.frombuffer(stream, dtype="<u2")
 
 
 class TransformersBackend:
     name = "transformers"
 
-    def __init__(self, model_name: str, dtype: str) -> None:
+    def __init__(
+        self,
+        model_name: str,
+        dtype: str,
+        int8: bool = False,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cuda_streams: int = DEFAULT_CUDA_STREAMS,
+    ) -> None:
         self.model_name = model_name
         self.dtype = dtype
-        self._lock = threading.Lock()
+        self.int8 = int8
+        self.cuda_streams = max(1, cuda_streams)
+        # The Rust tokenizer is not safe to call concurrently and also guards the
+        # token cache. Forwards are serialized by _forward_lock on CPU; on CUDA
+        # each call checks a stream out of _streams, which also caps how many
+        # forwards are in flight at once.
+        self._tokenizer_lock = threading.Lock()
+        self._forward_lock = threading.Lock()
+        self._streams: queue.Queue[Any] | None = None
+        # (input_ids, attention_mask) per (max_length, text) digest, in LRU order.
+        self._token_cache: OrderedDict[bytes, tuple[list[int], list[int]]] = OrderedDict()
+        self._token_cache_size = max(0, cache_size)
         self._torch = None
         self._tokenizer = None
         self._model = None
+        self._cpu_autocast = False
         self.device = "cpu"
         self.dimensions = 0
         self._load_model()
@@ -145,60 +194,213 @@ class TransformersBackend:
         self._torch = torch
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
 
-        dtype_map = {
-            "float16": torch.float16,
-            "bfloat16": torch.bfloat16,
-            "float32": torch.float32,
-        }
-        torch_dtype = dtype_map.get(self.dtype, torch.float16)
+        # Dynamic int8 quantization replaces float32 nn.Linear weights, so the
+        # model is loaded in float32 when it is requested.
+        quantize = self.int8 and self.device == "cpu"
+        if self.int8 and not quantize:
+            logging.warning("int8 quantization only applies to CPU inference; ignoring on %s", self.device)
+        torch_dtype = torch.float32 if quantize else self._resolve_dtype()
 
         started = time.perf_counter()
         logging.info(
             "Loading model backend=transformers model=%s device=%s dtype=%s",
             self.model_name,
             self.device,
-            self.dtype,
+            str(torch_dtype).removeprefix("torch."),
         )
-        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, trust_remote_code=True)
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=True, trust_remote_code=True)
+        if not getattr(self._tokenizer, "is_fast", False):
+            logging.warning("No fast tokenizer for %s; batch tokenization will run in Python", self.model_name)
         self._model = AutoModel.from_pretrained(
             self.model_name,
             dtype=torch_dtype,
             trust_remote_code=True,
         ).to(self.device)
         self._model.eval()
-        loaded_ms = (time.perf_counter() - started) * 1000
 
         hidden_size = getattr(getattr(self._model, "config", None), "hidden_size", 0)
         self.dimensions = int(hidden_size) if int(hidden_size) > 0 else PIPELINE_VECTOR_DIMENSIONS
+        if self.device == "cuda":
+            self._streams = queue.Queue()
+            for _ in range(self.cuda_streams):
+                self._streams.put(torch.cuda.Stream())
+            self._compile_model()
+        elif quantize:
+            self._quantize_int8()
+        else:
+            self._optimize_for_cpu(torch_dtype)
+        loaded_ms = (time.perf_counter() - started) * 1000
         logging.info("Model loaded in %.1fms dimensions=%d", loaded_ms, self.dimensions)
 
-    def embed(self, texts: Sequence[str], *, max_length: int) -> list[list[float]]:
+    def _resolve_dtype(self) -> Any:
+        torch = self._torch
+        dtype_map = {
+            "float16": torch.float16,
+            "bfloat16": torch.bfloat16,
+            "float32": torch.float32,
+        }
+        if self.dtype in dtype_map:
+            return dtype_map[self.dtype]
+        # auto: bf16 matches fp16 throughput on Ampere+ without attention overflow,
+        # and x86 CPUs have native bf16 kernels (AVX512-BF16/AMX) but no fast fp16.
+        if self.device == "cpu":
+            return torch.bfloat16
+        if torch.cuda.get_device_capability()[0] >= 8:
+            return torch.bfloat16
+        return torch.float16
+
+    def _optimize_for_cpu(self, torch_dtype: Any) -> None:
+        torch = self._torch
+        self._cpu_autocast = torch_dtype == torch.bfloat16
+        try:
+            import intel_extension_for_pytorch as ipex
+        except ImportError:
+            return
+        self._model = ipex.optimize(self._model, dtype=torch_dtype if self._cpu_autocast else None)
+        logging.info("Applied intel_extension_for_pytorch %s optimizations", ipex.__version__)
+
+    def _compile_model(self) -> None:
+        torch = self._torch
+        eager_model = self._model
+        # No CUDA graphs (reduce-overhead): their recording state is per thread,
+        # and forwards run on the batcher or request threads, never on this one.
+        try:
+            self._model = torch.compile(eager_model, mode="default", fullgraph=False)
+            # Compilation is lazy; run one tiny forward now so its latency is paid
+            # at startup instead of by the first request.
+            self._warmup()
+        except Exception as exc:  # noqa: BLE001
+            logging.warning("torch.compile unavailable, using eager model: %s", exc)
+            self._model = eager_model
+
+    def _quantize_int8(self) -> None:
+        torch = self._torch
+        self._model = torch.ao.quantization.quantize_dynamic(self._model, {torch.nn.Linear}, dtype=torch.qint8)
+        logging.info("Applied dynamic int8 quantization engine=%s", torch.backends.quantized.engine)
+
+    def _warmup(self) -> None:
+        torch = self._torch
+        with self._forward_slot():
+            encoded = self._to_device(self._tokenizer(["warmup"], return_tensors="pt"))
+            with torch.inference_mode():
+                self._model(**encoded)
+            torch.cuda.current_stream().synchronize()
+
+    @contextlib.contextmanager
+    def _forward_slot(self) -> Iterator[None]:
+        if self._streams is None:
+            with self._forward_lock:
+                yield
+            return
+        stream = self._streams.get()
+        try:
+            with self._torch.cuda.stream(stream):
+                yield
+        finally:
+            self._streams.put(stream)
+
+    def _to_device(self, encoded: Any) -> Any:
+        if self.device != "cuda":
+            return encoded
+        # Pinned host buffers let the copies run asynchronously on the current stream.
+        return {key: value.pin_memory().to(self.device, non_blocking=True) for key, value in encoded.items()}
+
+    def embed(self, texts: Sequence[str], *, max_length: int) -> np.ndarray:
         if len(texts) == 0:
-            return []
+            return np.empty((0, self.dimensions), dtype=np.float32)
         if self._torch is None or self._tokenizer is None or self._model is None:
             raise RuntimeError("transformers backend not initialized")
 
         torch = self._torch
-        with self._lock:
-            encoded = self._tokenizer(
-                list(texts),
-                padding=True,
-                truncation=True,
-                max_length=max_length,
-                return_tensors="pt",
-            ).to(self.device)
-
-            with torch.no_grad():
-                outputs = self._model(**encoded)
-                attention_mask = encoded["attention_mask"]
-                last_token_indices = attention_mask.sum(dim=1) - 1
-                batch_size = outputs.last_hidden_state.shape[0]
-                embeddings = outputs.last_hidden_state[
-                    torch.arange(batch_size, device=self.device),
-                    last_token_indices,
-                ]
-                embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
-            return embeddings.cpu().float().tolist()
+        # Tokenize once without padding, then pad each length bucket on its own so
+        # one long outlier does not stretch every row to its sequence length.
+        with self._tokenizer_lock:
+            input_ids, attention_masks = self._tokenize(texts, max_length)
+        order = sorted(range(len(texts)), key=lambda index: len(input_ids[index]))
+
+        # The compiled CUDA model guards on input shapes, so buckets are padded to
+        # a bounded set of them: lengths to a multiple of LENGTH_BUCKET_TOLERANCE,
+        # row counts to a power of two by repeating the last row.
+        compiled = self.device == "cuda"
+        copies = []
+        for bucket in self._length_buckets(order, input_ids):
+            rows = bucket
+            if compiled:
+                rows = bucket + [bucket[-1]] * ((1 << (len(bucket) - 1).bit_length()) - len(bucket))
+            with self._tokenizer_lock:
+                batch = self._tokenizer.pad(
+                    {
+                        "input_ids": [input_ids[index] for index in rows],
+                        "attention_mask": [attention_masks[index] for index in rows],
+                    },
+                    padding=True,
+                    pad_to_multiple_of=LENGTH_BUCKET_TOLERANCE if compiled else None,
+                    return_tensors="pt",
+                )
+            with self._forward_slot():
+                batch = self._to_device(batch)
+
+                with torch.inference_mode(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=self._cpu_autocast):
+                    hidden = self._model(**batch).last_hidden_state
+                    # Last-token pooling as one gather along the sequence axis.
+                    last_token_indices = batch["attention_mask"].sum(dim=1) - 1
+                    gather_index = last_token_indices.view(-1, 1, 1).expand(-1, 1, hidden.size(-1))
+                    embeddings = hidden.gather(1, gather_index).squeeze(1)[: len(bucket)]
+                    embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1).float()
+                # Only enqueue the device->host copy here. Every bucket's forward
+                # and copy is queued before the host waits on any of them, so the
+                # next bucket is padded and launched while the GPU is still busy
+                # with this one.
+                host = embeddings.to("cpu", non_blocking=True)
+                copied = None
+                if self.device == "cuda":
+                    copied = torch.cuda.Event()
+                    copied.record()
+            copies.append((host, copied))
+
+        chunks = []
+        for host, copied in copies:
+            if copied is not None:
+                copied.synchronize()
+            chunks.append(host.numpy())
+
+        vectors = np.empty((len(texts), chunks[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.concatenate(chunks)
+        return vectors
+
+    def _tokenize(self, texts: Sequence[str], max_length: int) -> tuple[list[list[int]], list[list[int]]]:
+        # Caller holds self._tokenizer_lock. Only cache misses go through the tokenizer.
+        keys = [_text_digest(f"{max_length}\n{text}") for text in texts]
+        input_ids: list[list[int]] = [[] for _ in texts]
+        attention_masks: list[list[int]] = [[] for _ in texts]
+        missing: list[int] = []
+        for index, key in enumerate(keys):
+            cached = self._token_cache.get(key)
+            if cached is None:
+                missing.append(index)
+                continue
+            self._token_cache.move_to_end(key)
+            input_ids[index], attention_masks[index] = cached
+
+        if missing:
+            encoded = self._tokenizer([texts[index] for index in missing], truncation=True, max_length=max_length)
+            for index, ids, mask in zip(missing, encoded["input_ids"], encoded["attention_mask"]):
+                input_ids[index], attention_masks[index] = ids, mask
+                if self._token_cache_size > 0:
+                    self._token_cache[keys[index]] = (ids, mask)
+            while len(self._token_cache) > self._token_cache_size:
+                self._token_cache.popitem(last=False)
+        return input_ids, attention_masks
+
+    @staticmethod
+    def _length_buckets(order: list[int], input_ids: Sequence[Sequence[int]]) -> list[list[int]]:
+        buckets: list[list[int]] = []
+        for index in order:
+            if buckets and len(input_ids[index]) - len(input_ids[buckets[-1][0]]) <= LENGTH_BUCKET_TOLERANCE:
+                buckets[-1].append(index)
+            else:
+                buckets.append([index])
+        return buckets
 
     def health(self) -> dict[str, Any]:
         return {
@@ -238,6 +440,14 @@ def parse_input_texts(data: dict[str, Any], *, max_items: int) -> list[str]:
     return cleaned
 
 
+# Returns the distinct texts in first-seen order plus, for every input, its row
+# in that list, so callers can embed once and scatter back with vectors[inverse].
+def dedupe_texts(texts: Sequence[str]) -> tuple[list[str], list[int]]:
+    positions: dict[str, int] = {}
+    inverse = [positions.setdefault(text, len(positions)) for text in texts]
+    return list(positions), inverse
+
+
 def parse_max_length(data: dict[str, Any], default_value: int) -> int:
     raw = data.get("max_length", default_value)
     try:
@@ -251,16 +461,100 @@ def parse_max_length(data: dict[str, Any], default_value: int) -> int:
     return value
 
 
+@dataclass
+class PendingEmbed:
+    texts: list[str]
+    max_length: int
+    future: Future[np.ndarray] = field(default_factory=Future)
+
+
+# Coalesces concurrent server requests into one backend.embed call. The first
+# queued request opens a window of window_ms; requests with the same max_length
+# that arrive before it closes are merged (up to max_items texts), embedded
+# together, and split back per caller.
+class EmbeddingBatcher:
+    def __init__(self, backend: EmbeddingBackend, *, window_ms: int, max_items: int) -> None:
+        self._backend = backend
+        self._window = window_ms / 1000
+        self._max_items = max_items
+        self._queue: queue.Queue[PendingEmbed | None] = queue.Queue()
+        self._carry: PendingEmbed | None = None
+        self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def embed(self, texts: Sequence[str], *, max_length: int) -> np.ndarray:
+        pending = PendingEmbed(list(texts), max_length)
+        self._queue.put(pending)
+        return pending.future.result()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            first = self._carry if self._carry is not None else self._queue.get()
+            self._carry = None
+            if first is None:
+                return
+            batch = [first]
+            count = len(first.texts)
+            deadline = time.monotonic() + self._window
+            while count < self._max_items:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    # close() was called mid-window: finish this batch, then stop.
+                    self._flush(batch)
+                    return
+                if item.max_length != first.max_length or count + len(item.texts) > self._max_items:
+                    self._carry = item
+                    break
+                batch.append(item)
+                count += len(item.texts)
+            self._flush(batch)
+
+    def _flush(self, batch: list[PendingEmbed]) -> None:
+        texts = [text for pending in batch for text in pending.texts]
+        unique_texts, inverse = dedupe_texts(texts)
+        try:
+            vectors = self._backend.embed(unique_texts, max_length=batch[0].max_length)
+            if len(vectors) != len(unique_texts):
+                raise RuntimeError(f"backend returned {len(vectors)} embeddings for {len(unique_texts)} texts")
+        except Exception as exc:  # noqa: BLE001
+            for pending in batch:
+                pending.future.set_exception(exc)
+            return
+
+        if len(batch) == 1:
+            batch[0].future.set_result(vectors[inverse] if len(unique_texts) != len(texts) else vectors)
+            return
+        offset = 0
+        for pending in batch:
+            rows = inverse[offset : offset + len(pending.texts)]
+            offset += len(pending.texts)
+            pending.future.set_result(vectors[rows])
+
+
 @dataclass
 class ServiceState:
     settings: Settings
     backend: EmbeddingBackend
     started_at: float
+    batcher: EmbeddingBatcher | None = None
 
 
 def create_handler(state: ServiceState) -> type[BaseHTTPRequestHandler]:
     class Handler(BaseHTTPRequestHandler):
         server_version = "embedding-service/1.0"
+        # HTTP/1.1 so /v1/embeddings can stream a chunked body; every other
+        # response carries a Content-Length and errors close the connection.
+        protocol_version = "HTTP/1.1"
 
         def do_GET(self) -> None:
             if self.path != "/health":
@@ -277,53 +571,49 @@ def create_handler(state: ServiceState) -> type[BaseHTTPRequestHandler]:
                 body = self._read_json()
                 texts = parse_input_texts(body, max_items=state.settings.max_items)
                 max_length = parse_max_length(body, state.settings.max_length)
+            except orjson.JSONDecodeError:
+                self._write_error(HTTPStatus.BAD_REQUEST, "invalid JSON body")
+                return
             except ValueError as exc:
                 self._write_error(HTTPStatus.BAD_REQUEST, str(exc))
                 return
-            except json.JSONDecodeError:
-                self._write_error(HTTPStatus.BAD_REQUEST, "invalid JSON body")
-                return
 
+            unique_texts, inverse = dedupe_texts(texts)
+            embed = state.batcher.embed if state.batcher is not None else state.backend.embed
             started = time.perf_counter()
             try:
-                vectors = state.backend.embed(texts, max_length=max_length)
+                vectors = embed(unique_texts, max_length=max_length)
             except Exception as exc:  # noqa: BLE001
                 logging.exception("embedding inference failed")
                 self._write_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"inference failed: {exc}")
                 return
             elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
 
-            if len(vectors) != len(texts):
+            if len(vectors) != len(unique_texts):
                 self._write_error(
                     HTTPStatus.INTERNAL_SERVER_ERROR,
-                    f"backend returned {len(vectors)} embeddings for {len(texts)} texts",
+                    f"backend returned {len(vectors)} embeddings for {len(unique_texts)} texts",
                 )
                 return
-            if len(vectors) > 0 and len(vectors[0]) != state.backend.dimensions:
+            if vectors.shape[1] != state.backend.dimensions:
                 self._write_error(
                     HTTPStatus.INTERNAL_SERVER_ERROR,
-                    f"dimension mismatch: got {len(vectors[0])}, expected {state.backend.dimensions}",
+                    f"dimension mismatch: got {vectors.shape[1]}, expected {state.backend.dimensions}",
                 )
                 return
+            if len(unique_texts) != len(texts):
+                vectors = vectors[inverse]
 
             if self.path == "/v1/embeddings":
-                payload = {
-                    "object": "list",
-                    "data": [
-                        {"object": "embedding", "index": index, "embedding": vector}
-                        for index, vector in enumerate(vectors)
-                    ],
-                    "model": state.settings.model_name,
-                    "usage": {"prompt_tokens": 0, "total_tokens": 0},
-                }
-            else:
-                payload = {
-                    "embeddings": vectors,
-                    "model": state.settings.model_name,
-                    "dimensions": state.backend.dimensions,
-                    "count": len(vectors),
-                    "elapsed_ms": elapsed_ms,
-                }
+                self._write_openai_embeddings(vectors)
+                return
+            payload = {
+                "embeddings": vectors,
+                "model": state.settings.model_name,
+                "dimensions": state.backend.dimensions,
+                "count": len(vectors),
+                "elapsed_ms": elapsed_ms,
+            }
             self._write_json(HTTPStatus.OK, payload)
 
         def _health_payload(self) -> dict[str, Any]:
@@ -336,10 +626,10 @@ def create_handler(state: ServiceState) -> type[BaseHTTPRequestHandler]:
 
         def _read_json(self) -> dict[str, Any]:
             raw_length = self.headers.get("Content-Length", "0").strip()
-            try:
-                content_length = int(raw_length)
-            except ValueError as exc:
-                raise ValueError("invalid Content-Length header") from exc
+            # int() would also accept "+12", "1_000" and non-ASCII digits.
+            if not (raw_length.isascii() and raw_length.isdigit()):
+                raise ValueError("invalid Content-Length header")
+            content_length = int(raw_length)
 
             if content_length <= 0:
                 raise ValueError("empty request body")
@@ -348,20 +638,61 @@ def create_handler(state: ServiceState) -> type[BaseHTTPRequestHandler]:
                     f"request body too large: {content_length} bytes (max {state.settings.max_body_bytes})"
                 )
             raw_body = self.rfile.read(content_length)
-            decoded = json.loads(raw_body.decode("utf-8"))
+            if len(raw_body) != content_length:
+                raise ValueError("incomplete request body")
+            # Reject arrays, strings and scalars before paying for a full parse.
+            if raw_body.lstrip(b" \t\r\n")[:1] != b"{":
+                raise ValueError("request body must be a JSON object")
+            decoded = orjson.loads(raw_body)
             if not isinstance(decoded, dict):
                 raise ValueError("request body must be a JSON object")
             return decoded
 
         def _write_json(self, status: HTTPStatus, payload: dict[str, Any]) -> None:
-            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
             self.send_response(status.value)
             self.send_header("Content-Type", "application/json")
             self.send_header("Content-Length", str(len(body)))
+            if self.close_connection:
+                self.send_header("Connection", "close")
             self.end_headers()
             self.wfile.write(body)
 
+        def _write_openai_embeddings(self, vectors: np.ndarray) -> None:
+            # Same document as dumping {"object": "list", "data": [{...}, ...], ...},
+            # but each row is serialized straight from the matrix and sent as soon
+            # as it is produced, so only one row's bytes exist at a time. HTTP/1.0
+            # clients cannot take a chunked body and get one ended by the close.
+            chunked = self.request_version == "HTTP/1.1"
+            self.send_response(HTTPStatus.OK.value)
+            self.send_header("Content-Type", "application/json")
+            if chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            else:
+                self.send_header("Connection", "close")
+            self.end_headers()
+
+            write = self._write_chunk if chunked else self.wfile.write
+            write(b'{"object":"list","data":[')
+            for index, vector in enumerate(vectors):
+                write(
+                    b'%s{"object":"embedding","index":%d,"embedding":%s}'
+                    % (b"," if index else b"", index, orjson.dumps(vector, option=orjson.OPT_SERIALIZE_NUMPY))
+                )
+            write(
+                b'],"model":%s,"usage":{"prompt_tokens":0,"total_tokens":0}}'
+                % orjson.dumps(state.settings.model_name)
+            )
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, data: bytes) -> None:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
         def _write_error(self, status: HTTPStatus, message: str) -> None:
+            # The request body may be unread (bad or oversized Content-Length),
+            # so the connection cannot be reused for another request.
+            self.close_connection = True
             self._write_json(status, {"error": message})
 
         def log_message(self, fmt: str, *args: Any) -> None:
@@ -372,9 +703,15 @@ def create_handler(state: ServiceState) -> type[BaseHTTPRequestHandler]:
 
 def create_backend(settings: Settings) -> EmbeddingBackend:
     if settings.backend == "deterministic":
-        backend: EmbeddingBackend = DeterministicBackend(settings.model_name)
+        backend: EmbeddingBackend = DeterministicBackend(settings.model_name, settings.cache_size)
     elif settings.backend == "transformers":
-        backend = TransformersBackend(settings.model_name, settings.dtype)
+        backend = TransformersBackend(
+            settings.model_name,
+            settings.dtype,
+            int8=settings.int8,
+            cache_size=settings.cache_size,
+            cuda_streams=settings.cuda_streams,
+        )
     else:
         raise ValueError(f"unsupported backend: {settings.backend}")
 
@@ -388,7 +725,10 @@ def create_backend(settings: Settings) -> EmbeddingBackend:
 
 def run_server(settings: Settings) -> int:
     backend = create_backend(settings)
-    state = ServiceState(settings=settings, backend=backend, started_at=time.time())
+    batcher = None
+    if settings.batch_window_ms > 0:
+        batcher = EmbeddingBatcher(backend, window_ms=settings.batch_window_ms, max_items=settings.max_items)
+    state = ServiceState(settings=settings, backend=backend, started_at=time.time(), batcher=batcher)
     server = ThreadingHTTPServer((settings.host, settings.port), create_handler(state))
     server.daemon_threads = True
 
@@ -411,6 +751,8 @@ def run_server(settings: Settings) -> int:
         server.serve_forever(poll_interval=0.5)
     finally:
         server.server_close()
+        if batcher is not None:
+            batcher.close()
         logging.info("Embedding service stopped")
     return 0
 
@@ -420,7 +762,11 @@ def run_check(settings: Settings) -> int:
     print(f"  backend: {settings.backend}")
     print(f"  model: {settings.model_name}")
     print(f"  dtype: {settings.dtype}")
+    print(f"  int8: {settings.int8}")
     print(f"  max_length: {settings.max_length}")
+    print(f"  cache_size: {settings.cache_size}")
+    print(f"  batch_window_ms: {settings.batch_window_ms}")
+    print(f"  cuda_streams: {settings.cuda_streams}")
     print(f"  expected_dimensions: {PIPELINE_VECTOR_DIMENSIONS}")
     if settings.backend == "transformers":
         try:
@@ -430,6 +776,8 @@ def run_check(settings: Settings) -> int:
             return 1
         print(f"  torch_version: {torch.__version__}")
         print(f"  cuda_available: {torch.cuda.is_available()}")
+        # fbgemm/onednn are the x86 int8 engines (VNNI-accelerated when the CPU supports it).
+        print(f"  quantized_engines: {', '.join(torch.backends.quantized.supported_engines)}")
         if torch.cuda.is_available():
             print(f"  cuda_version: {torch.version.cuda}")
             print(f"  gpu_name: {torch.cuda.get_device_name(0)}")
@@ -443,8 +791,8 @@ def run_cli(settings: Settings) -> int:
         return 0
 
     try:
-        parsed = json.loads(raw)
-    except json.JSONDecodeError:
+        parsed = orjson.loads(raw)
+    except orjson.JSONDecodeError:
         parsed = {"texts": [line.strip() for line in raw.splitlines() if line.strip() != ""]}
 
     if isinstance(parsed, str):
@@ -458,8 +806,11 @@ def run_cli(settings: Settings) -> int:
     texts = parse_input_texts(parsed, max_items=settings.max_items)
     max_length = parse_max_length(parsed, settings.max_length)
     backend = create_backend(settings)
-    vectors = backend.embed(texts, max_length=max_length)
-    print(json.dumps(vectors))
+    unique_texts, inverse = dedupe_texts(texts)
+    vectors = backend.embed(unique_texts, max_length=max_length)
+    if len(unique_texts) != len(texts):
+        vectors = vectors[inverse]
+    print(orjson.dumps(vectors, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8"))
     return 0
 
 
@@ -476,10 +827,29 @@ def build_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument("--model", dest="model_name", default=_env("EMBED_MODEL_NAME", DEFAULT_MODEL_NAME))
     parser.add_argument("--model-key", default=_env("EMBED_MODEL_KEY", DEFAULT_MODEL_KEY))
-    parser.add_argument("--dtype", choices=["float16", "bfloat16", "float32"], default=_env("EMBED_DTYPE", DEFAULT_DTYPE))
+    parser.add_argument("--dtype", choices=["auto", "float16", "bfloat16", "float32"], default=_env("EMBED_DTYPE", DEFAULT_DTYPE))
+    parser.add_argument(
+        "--int8",
+        action="store_true",
+        default=_env_bool("EMBED_INT8", False),
+        help="Dynamically quantize nn.Linear layers to int8 (CPU only)",
+    )
     parser.add_argument("--max-length", type=int, default=_env_int("EMBED_MAX_LENGTH", DEFAULT_MAX_LENGTH))
     parser.add_argument("--max-items", type=int, default=_env_int("EMBED_MAX_ITEMS", DEFAULT_MAX_ITEMS))
     parser.add_argument("--max-body-bytes", type=int, default=_env_int("EMBED_MAX_BODY_BYTES", DEFAULT_MAX_BODY_BYTES))
+    parser.add_argument("--cache-size", type=int, default=_env_int("EMBED_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+    parser.add_argument(
+        "--batch-window-ms",
+        type=int,
+        default=_env_int("EMBED_BATCH_WINDOW_MS", DEFAULT_BATCH_WINDOW_MS),
+        help="Merge concurrent server requests arriving within this window into one batch (0 disables)",
+    )
+    parser.add_argument(
+        "--cuda-streams",
+        type=int,
+        default=_env_int("EMBED_CUDA_STREAMS", DEFAULT_CUDA_STREAMS),
+        help="Concurrent forward passes on CUDA, one stream each; needs --batch-window-ms 0",
+    )
     parser.add_argument("--log-level", default=_env("EMBED_LOG_LEVEL", "INFO"))
     return parser
 
@@ -495,9 +865,13 @@ def main() -> int:
         model_name=args.model_name,
         model_key=args.model_key,
         dtype=args.dtype,
+        int8=bool(args.int8),
         max_length=max(8, int(args.max_length)),
         max_items=max(1, int(args.max_items)),
         max_body_bytes=max(1024, int(args.max_body_bytes)),
+        cache_size=max(0, int(args.cache_size)),
+        batch_window_ms=max(0, int(args.batch_window_ms)),
+        cuda_streams=max(1, int(args.cuda_streams)),
         log_level=args.log_level.upper(),
     )
 
@@ -505,6 +879,9 @@ def main() -> int:
         level=getattr(logging, settings.log_level, logging.INFO),
         format="%(asctime)s %(levelname)s %(message)s",
     )
+    # The service never forks after loading the tokenizer, so let the Rust
+    # tokenizers encode batches across cores unless the operator opted out.
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
 
     try:
         if args.check:
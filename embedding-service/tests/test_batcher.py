@@ -0,0 +1,137 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from main import DeterministicBackend, EmbeddingBatcher  # noqa: E402
+
+# Long enough that a window never closes on its own during a test; batches are
+# flushed by filling max_items, by a carried request, or by close().
+LONG_WINDOW_MS = 10_000
+
+
+class RecordingBackend:
+    """DeterministicBackend that records each embed call and signals it on an Event."""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self._inner = DeterministicBackend("test")
+        self.dimensions = self._inner.dimensions
+        self.error = error
+        self.calls: list[tuple[list[str], int]] = []
+        self.called = threading.Event()
+
+    def embed(self, texts, *, max_length):
+        self.calls.append((list(texts), max_length))
+        self.called.set()
+        if self.error is not None:
+            raise self.error
+        return self._inner.embed(texts, max_length=max_length)
+
+
+class Caller(threading.Thread):
+    def __init__(self, batcher: EmbeddingBatcher, texts: list[str], max_length: int = 16) -> None:
+        super().__init__(daemon=True)
+        self.batcher = batcher
+        self.texts = texts
+        self.max_length = max_length
+        self.result = None
+        self.error = None
+        self.start()
+
+    def run(self) -> None:
+        try:
+            self.result = self.batcher.embed(self.texts, max_length=self.max_length)
+        except Exception as exc:  # noqa: BLE001
+            self.error = exc
+
+
+def expected(texts: list[str]) -> np.ndarray:
+    return DeterministicBackend("test").embed(texts, max_length=16)
+
+
+class EmbeddingBatcherTest(unittest.TestCase):
+    def join(self, *callers: Caller) -> None:
+        for caller in callers:
+            caller.join(timeout=5)
+            self.assertFalse(caller.is_alive(), "embed() did not return")
+
+    def close(self, batcher: EmbeddingBatcher) -> None:
+        closer = threading.Thread(target=batcher.close, daemon=True)
+        closer.start()
+        closer.join(timeout=5)
+        self.assertFalse(closer.is_alive(), "close() hung")
+
+    def test_merges_concurrent_requests_with_same_max_length(self) -> None:
+        backend = RecordingBackend()
+        batcher = EmbeddingBatcher(backend, window_ms=LONG_WINDOW_MS, max_items=4)
+        first = Caller(batcher, ["a", "b"])
+        second = Caller(batcher, ["c", "d"])
+        self.join(first, second)
+        self.close(batcher)
+
+        self.assertEqual(len(backend.calls), 1)
+        self.assertEqual(sorted(backend.calls[0][0]), ["a", "b", "c", "d"])
+        np.testing.assert_array_equal(first.result, expected(["a", "b"]))
+        np.testing.assert_array_equal(second.result, expected(["c", "d"]))
+
+    def test_carries_different_max_length_into_next_batch(self) -> None:
+        backend = RecordingBackend()
+        batcher = EmbeddingBatcher(backend, window_ms=LONG_WINDOW_MS, max_items=64)
+        short = Caller(batcher, ["a"], max_length=16)
+        long = Caller(batcher, ["b"], max_length=32)
+        # Whichever request came first is flushed once the other one arrives;
+        # the other is carried into a new window, which close() then flushes.
+        self.assertTrue(backend.called.wait(timeout=5))
+        self.close(batcher)
+        self.join(short, long)
+
+        self.assertEqual(sorted(backend.calls, key=lambda call: call[1]), [(["a"], 16), (["b"], 32)])
+        np.testing.assert_array_equal(short.result, expected(["a"]))
+        np.testing.assert_array_equal(long.result, expected(["b"]))
+
+    def test_splits_deduplicated_rows_back_per_caller(self) -> None:
+        backend = RecordingBackend()
+        batcher = EmbeddingBatcher(backend, window_ms=LONG_WINDOW_MS, max_items=5)
+        first = Caller(batcher, ["x", "y", "x"])
+        second = Caller(batcher, ["y", "z"])
+        self.join(first, second)
+        self.close(batcher)
+
+        self.assertEqual(len(backend.calls), 1)
+        self.assertEqual(sorted(backend.calls[0][0]), ["x", "y", "z"])
+        np.testing.assert_array_equal(first.result, expected(["x", "y", "x"]))
+        np.testing.assert_array_equal(second.result, expected(["y", "z"]))
+
+    def test_backend_error_fails_every_waiting_request(self) -> None:
+        error = RuntimeError("boom")
+        backend = RecordingBackend(error=error)
+        batcher = EmbeddingBatcher(backend, window_ms=LONG_WINDOW_MS, max_items=2)
+        first = Caller(batcher, ["a"])
+        second = Caller(batcher, ["b"])
+        self.join(first, second)
+        self.close(batcher)
+
+        self.assertEqual(len(backend.calls), 1)
+        self.assertIs(first.error, error)
+        self.assertIs(second.error, error)
+
+    def test_close_during_open_window_flushes_and_returns(self) -> None:
+        backend = RecordingBackend()
+        batcher = EmbeddingBatcher(backend, window_ms=LONG_WINDOW_MS, max_items=64)
+        first = Caller(batcher, ["a"], max_length=16)
+        second = Caller(batcher, ["b", "c"], max_length=32)
+        # After the first flush the other request sits in an open window.
+        self.assertTrue(backend.called.wait(timeout=5))
+        self.close(batcher)
+        self.join(first, second)
+
+        self.assertEqual(first.result.shape, (1, backend.dimensions))
+        self.assertEqual(second.result.shape, (2, backend.dimensions))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from main import TransformersBackend  # noqa: E402
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# Any small causal LM checkpoint available locally or from the hub.
+TEST_MODEL = os.getenv("EMBED_TEST_MODEL", "hf-internal-testing/tiny-random-LlamaModel")
+
+
+@unittest.skipUnless(torch is not None and torch.cuda.is_available(), "needs torch with CUDA")
+class TransformersBackendThreadTest(unittest.TestCase):
+    def test_embed_from_another_thread_than_load(self) -> None:
+        # The model is compiled and warmed up on this thread; serving threads differ.
+        backend = TransformersBackend(TEST_MODEL, "auto")
+        results = []
+        errors = []
+
+        def run() -> None:
+            try:
+                results.append(backend.embed(["first text", "a second, longer text"], max_length=32))
+            except Exception as exc:  # noqa: BLE001
+                errors.append(exc)
+
+        for _ in range(2):
+            worker = threading.Thread(target=run)
+            worker.start()
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual([r.shape for r in results], [(2, backend.dimensions)] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,751 @@
+"""
+Shared fetch/parse/format helpers for the news skills' fetch_news.py scripts.
+
+The scripts run standalone, so they put this directory on sys.path and
+import from here. Each script keeps its own sources, keyword list and
+digest layout; everything source-agnostic lives in this module.
+
+Scripts may override USER_AGENT and POOL_SIZE; both are read per request.
+"""
+
+import email.utils
+import hashlib
+import http.client
+import io
+import json
+import math
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import as_completed
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from html import unescape
+from typing import NamedTuple, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps(obj, ensure_ascii=True):
+        # orjson never escapes non-ASCII text, so ensure_ascii only affects the fallback.
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+else:
+    json_loads = json.loads
+
+    def json_dumps(obj, ensure_ascii=True):
+        return json.dumps(obj, indent=2, ensure_ascii=ensure_ascii)
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # optional speedup; stdlib ElementTree is the fallback
+    lxml_etree = None
+
+if lxml_etree is not None:
+    XMLParseError = lxml_etree.LxmlError
+
+    def iterparse(source):
+        # recover=True keeps the items around a broken entity or stray tag
+        # instead of losing the whole feed.
+        return lxml_etree.iterparse(source, events=("end",), recover=True, resolve_entities=False)
+
+    def xml_fromstring(xml_bytes):
+        return lxml_etree.fromstring(xml_bytes, lxml_etree.XMLParser(recover=True, resolve_entities=False))
+else:
+    XMLParseError = ET.ParseError
+
+    def iterparse(source):
+        return ET.iterparse(source, events=("end",))
+
+    xml_fromstring = ET.fromstring
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+ATOM_FEED = ATOM_NS + "feed"
+ATOM_ENTRY = ATOM_NS + "entry"
+ATOM_TITLE = ATOM_NS + "title"
+ATOM_LINK = ATOM_NS + "link"
+ATOM_SUMMARY = ATOM_NS + "summary"
+ATOM_PUBLISHED = ATOM_NS + "published"
+ATOM_UPDATED = ATOM_NS + "updated"
+ATOM_ID = ATOM_NS + "id"
+ATOM_CATEGORY = ATOM_NS + "category"
+
+# Strips HTML tags from feed descriptions.
+TAG_RE = re.compile(r"<[^>]+>")
+
+# --- HTTP ---
+
+USER_AGENT = "Mozilla/5.0 (compatible; ScoopNewsBot/1.0)"
+CONNECT_TIMEOUT = 5
+MAX_REDIRECTS = 5
+# Idle keep-alive connections kept per host; scripts set this to their
+# fetch worker count.
+POOL_SIZE = 8
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+_CACHE_ROOT = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "scoop")
+# Conditional-GET cache: bodies that came with an ETag or Last-Modified are
+# kept here and revalidated on the next run, so unchanged feeds come back as
+# a body-less 304.
+CACHE_DIR = os.path.join(_CACHE_ROOT, "http")
+
+
+class _HostPool:
+    """Keep-alive HTTP(S) connections to one host, shared across threads."""
+
+    def __init__(self, scheme, netloc):
+        self.scheme = scheme
+        self.netloc = netloc
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.scheme == "https":
+            conn = http.client.HTTPSConnection(self.netloc, timeout=CONNECT_TIMEOUT)
+        else:
+            conn = http.client.HTTPConnection(self.netloc, timeout=CONNECT_TIMEOUT)
+        conn.connect()
+        return conn
+
+    def request(self, path, timeout=15, headers=None):
+        """GET path on this host. Returns (response, body); response is already read."""
+        # A pooled connection may have been closed by the server while idle, so
+        # a failure on a reused socket is retried once on a fresh one.
+        for attempt in range(2):
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            reused = conn is not None
+            if conn is None:
+                conn = self._connect()
+            try:
+                # Connect fails fast on CONNECT_TIMEOUT; reads get the caller's timeout.
+                conn.sock.settimeout(timeout)
+                conn.request("GET", path, headers={"User-Agent": USER_AGENT, **(headers or {})})
+                resp = conn.getresponse()
+                body = resp.read()
+            except (ConnectionError, http.client.HTTPException):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            self._release(conn, resp)
+            return resp, body
+
+    def _release(self, conn, resp):
+        if resp.will_close:
+            conn.close()
+            return
+        with self._lock:
+            if len(self._idle) < POOL_SIZE:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+_PROXIES = urllib.request.getproxies()
+
+
+def host_pool(scheme, netloc):
+    """Return the shared connection pool for scheme://netloc."""
+    key = (scheme, netloc.lower())
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = _HostPool(*key)
+    return pool
+
+
+def _cache_paths(url):
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, key + ".json"), os.path.join(CACHE_DIR, key)
+
+
+def _cache_load(url, max_age=0):
+    """Return (conditional request headers, cached body, fresh) for url, or ({}, None, False).
+
+    fresh means the copy is younger than max_age seconds and can be used as is.
+    """
+    meta_path, body_path = _cache_paths(url)
+    try:
+        with open(meta_path, "rb") as f:
+            meta = json_loads(f.read())
+        with open(body_path, "rb") as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return {}, None, False
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    fresh = max_age > 0 and time.time() - meta.get("fetched", 0) < max_age
+    return headers, body, fresh
+
+
+def _cache_store(url, resp_headers, body, max_age=0):
+    etag = resp_headers.get("ETag")
+    last_modified = resp_headers.get("Last-Modified")
+    # Without validators a copy is only any use while it is fresh.
+    if not (etag or last_modified or max_age > 0):
+        return
+    meta = json.dumps({
+        "url": url, "etag": etag, "last_modified": last_modified, "fetched": time.time(),
+    }).encode("utf-8")
+    meta_path, body_path = _cache_paths(url)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Body first, then validators, each swapped in atomically, so a reader
+        # never pairs new validators with a stale or partial body.
+        for path, data in ((body_path, body), (meta_path, meta)):
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+    except OSError:
+        pass  # caching is best-effort; a read-only home just means no cache
+
+
+def _fetch_via_proxy(url, timeout, cache, max_age):
+    validators, cached, fresh = _cache_load(url, max_age) if cache else ({}, None, False)
+    if fresh:
+        return cached
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, **validators})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            body = resp.read()
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached is not None:
+            return cached
+        raise
+    if cache:
+        _cache_store(url, resp.headers, body, max_age)
+    return body
+
+
+def fetch_url(url, timeout=15, cache=True, max_age=0):
+    """Fetch URL content, return bytes or None on failure.
+
+    With cache, the response is revalidated against the on-disk copy in
+    CACHE_DIR, and a 304 returns the cached body. A copy fetched less than
+    max_age seconds ago is returned without any request.
+    """
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            if parts.scheme not in ("http", "https"):
+                raise ValueError(f"unsupported URL scheme: {parts.scheme!r}")
+            # Environment proxies are left to urllib, as before.
+            if _PROXIES.get(parts.scheme) and not urllib.request.proxy_bypass(parts.hostname or ""):
+                return _fetch_via_proxy(url, timeout, cache, max_age)
+
+            path = parts.path or "/"
+            if parts.query:
+                path = f"{path}?{parts.query}"
+            validators, cached, fresh = _cache_load(url, max_age) if cache else ({}, None, False)
+            if fresh:
+                return cached
+            resp, body = host_pool(parts.scheme, parts.netloc).request(path, timeout, validators)
+            location = resp.getheader("Location")
+            if resp.status in REDIRECT_STATUSES and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            if resp.status == 304 and cached is not None:
+                return cached
+            if resp.status >= 400:
+                raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+            if cache and resp.status == 200:
+                _cache_store(url, resp.headers, body, max_age)
+            return body
+        raise urllib.error.URLError(f"too many redirects (>{MAX_REDIRECTS})")
+    except Exception as e:
+        print(f"  [warn] Failed to fetch {url}: {e}", file=sys.stderr)
+        return None
+
+
+def fetch_url_stream(url, timeout=15):
+    """Open URL for incremental reads; caller closes the response. None on failure."""
+    # One-off large documents gain nothing from the keep-alive pool.
+    try:
+        req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        return urllib.request.urlopen(req, timeout=timeout)
+    except Exception as e:
+        print(f"  [warn] Failed to fetch {url}: {e}", file=sys.stderr)
+        return None
+
+
+# --- Stories ---
+
+class Story(NamedTuple):
+    title: str
+    url: str
+    summary: str
+    source: str
+    date: str
+    score: Optional[int] = None
+    type: Optional[str] = None
+
+    def to_dict(self):
+        """JSON form of the story; optional fields are omitted when unset."""
+        return {k: v for k, v in zip(self._fields, self) if v is not None}
+
+
+def keyword_pattern(keywords):
+    """Compile keywords into one regex that finds any of them as a substring."""
+    # Keywords are merged into a prefix trie, so the regex engine follows one
+    # branch per position instead of retrying every keyword the way a flat
+    # "a|b|c" alternation (or any(kw in text ...)) does.
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        if "" in node:
+            return ""  # a shorter keyword already ends here
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return re.compile(build(trie))
+
+
+def matches_keywords(pattern, title, summary=""):
+    """Check title (and summary) against a keyword_pattern() regex."""
+    # The title alone usually decides; only build the joined text when it does
+    # not, so keywords spanning the title/summary boundary still match.
+    if pattern.search(title.lower()):
+        return True
+    if not summary:
+        return False
+    return pattern.search(f"{title} {summary}".lower()) is not None
+
+
+def canonical_url(url):
+    """Dedupe key for a story URL, ignoring scheme, fragment, utm_* params and trailing slash."""
+    parts = urllib.parse.urlsplit(url.strip())
+    query = "&".join(p for p in parts.query.split("&") if p and not p.startswith("utm_"))
+    return urllib.parse.urlunsplit(("", parts.netloc.lower(), parts.path.rstrip("/"), query, ""))
+
+
+def make_item_id(source, unique_part):
+    """Stable 16-hex-digit source_item_id for an item; existing IDs depend on the md5."""
+    return hashlib.md5(f"{source}:{unique_part}".encode()).hexdigest()[:16]
+
+
+def dedupe_by_key(items, key, limit=None):
+    """Keep the first item for each key(item), in order; stop once limit are kept."""
+    unique = {}
+    if limit is None or limit > 0:
+        for item in items:
+            unique.setdefault(key(item), item)
+            if len(unique) == limit:
+                break
+    return list(unique.values())
+
+
+def dedupe_stories(stories):
+    """Drop stories whose canonical URL was already seen; the first one wins."""
+    return dedupe_by_key(stories, lambda s: canonical_url(s.url))
+
+
+# --- Cross-run dedupe ---
+
+# Items emitted by earlier --new-only runs, two Bloom filter generations per skill.
+SEEN_DIR = os.path.join(_CACHE_ROOT, "seen")
+SEEN_GENERATION = 7 * 24 * 3600  # length of one filter generation, in seconds
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over str keys (blake2b, double hashing), saved as one file."""
+
+    _HEADER = struct.Struct("<4sQId")  # magic, bit count, hash count, created (epoch s)
+    _MAGIC = b"SBF1"
+
+    def __init__(self, num_bits, num_hashes, created=None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.created = created or time.time()
+        self.bits = bytearray((num_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity=200_000, error_rate=1e-5):
+        """Smallest filter holding capacity keys at error_rate false positives (~600KB by default)."""
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        return cls(num_bits, max(1, round(num_bits / capacity * math.log(2))))
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, key):
+        bits = self.bits
+        for p in self._positions(key):
+            bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    @classmethod
+    def load(cls, path):
+        """Read a saved filter; None if missing or unreadable."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            magic, num_bits, num_hashes, created = cls._HEADER.unpack_from(data)
+        except (OSError, struct.error):
+            return None
+        if magic != cls._MAGIC:
+            return None
+        bf = cls(num_bits, num_hashes, created)
+        if len(data) - cls._HEADER.size != len(bf.bits):
+            return None
+        bf.bits[:] = data[cls._HEADER.size:]
+        return bf
+
+    def save(self, path):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(self._HEADER.pack(self._MAGIC, self.num_bits, self.num_hashes, self.created))
+                f.write(self.bits)
+            os.replace(tmp, path)
+        except OSError:
+            pass  # best-effort, like the HTTP cache
+
+
+def _generation(bf):
+    return None if bf is None else int(bf.created // SEEN_GENERATION)
+
+
+class SeenFilter:
+    """Keys seen by earlier runs, kept as a current and a previous BloomFilter.
+
+    Generations follow fixed SEEN_GENERATION-long periods. Keys are added to
+    the current one and looked up in both; when a new period starts the current
+    generation becomes the previous one and the old previous one is dropped, so
+    a key stays visible for at least one full period (and at most two).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.previous_path = path + ".prev"
+        period = int(time.time() // SEEN_GENERATION)
+        current = BloomFilter.load(path)
+        previous = BloomFilter.load(self.previous_path)
+        self._rotated = _generation(current) == period - 1
+        if self._rotated:
+            previous, current = current, None
+        elif _generation(current) != period:
+            current = None
+        if _generation(previous) != period - 1:
+            previous = None
+        self.current = current or BloomFilter.for_capacity()
+        self.previous = previous
+
+    def add(self, key):
+        self.current.add(key)
+
+    def __contains__(self, key):
+        return key in self.current or (self.previous is not None and key in self.previous)
+
+    def save(self):
+        self.current.save(self.path)
+        if self._rotated:
+            self.previous.save(self.previous_path)
+            self._rotated = False
+
+
+def seen_filter(name):
+    """The cross-run seen-item filter for one skill."""
+    return SeenFilter(os.path.join(SEEN_DIR, name + ".bloom"))
+
+
+# --- Dates ---
+
+_MONTHS = {
+    name: number
+    for number, name in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1
+    )
+}
+# "Sat, 04 Oct 2025 17:45:00 GMT" / "4 Oct 2025 17:45 +0200"
+_RFC822_RE = re.compile(
+    r"(?:[A-Za-z]{3}, )?(\d{1,2}) ([A-Za-z]{3}) (\d{4}) (\d{2}):(\d{2})(?::(\d{2}))? (GMT|UTC|UT|Z|[+-]\d{4})"
+)
+# "2025-10-04", "2025-10-04T17:45:00Z", "2025-10-04 17:45:00.123+02:00"
+_ISO8601_RE = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?(Z|[+-]\d{2}:?\d{2})?)?"
+)
+
+
+def _utc_offset(tz):
+    if tz in ("GMT", "UTC", "UT", "Z"):
+        return timezone.utc
+    minutes = int(tz[1:3]) * 60 + int(tz[-2:])
+    return timezone(timedelta(minutes=-minutes if tz[0] == "-" else minutes))
+
+
+def _parse_date_fast(date_str):
+    """Parse the common RFC 822 and ISO 8601 shapes directly; None if not one."""
+    # Anything unusual (named zones, 2-digit years, out-of-range fields) falls
+    # through to the slower email.utils/strptime chain in parse_date.
+    try:
+        m = _RFC822_RE.fullmatch(date_str)
+        if m:
+            day, month_name, year, hour, minute, second, tz = m.groups()
+            month = _MONTHS.get(month_name.lower())
+            if month is None:
+                return None
+            parsed = datetime(
+                int(year), month, int(day), int(hour), int(minute), int(second or 0),
+                tzinfo=_utc_offset(tz),
+            )
+            return parsed.astimezone(timezone.utc)
+
+        m = _ISO8601_RE.fullmatch(date_str)
+        if m:
+            year, month, day, hour, minute, second, fraction, tz = m.groups()
+            parsed = datetime(
+                int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+                int(fraction.ljust(6, "0")) if fraction else 0,
+                tzinfo=_utc_offset(tz) if tz else timezone.utc,
+            )
+            return parsed.astimezone(timezone.utc)
+    except ValueError:
+        pass
+    return None
+
+
+@lru_cache(maxsize=8192)
+def parse_date(date_str):
+    """Parse a date string in various formats. Returns datetime (UTC) or None."""
+    # Pure and returns immutable datetimes, so repeated strings (shared Atom
+    # <updated> stamps, failing formats) are safe to memoize across threads.
+    if not date_str or not date_str.strip():
+        return None
+    date_str = date_str.strip()
+
+    parsed = _parse_date_fast(date_str)
+    if parsed is not None:
+        return parsed
+
+    # Try RFC 2822 (RSS pubDate format: "Sat, 04 Oct 2025 17:45:00 GMT")
+    try:
+        parsed = email.utils.parsedate_to_datetime(date_str)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
+    except (ValueError, TypeError):
+        pass
+
+    # Try ISO 8601 variants
+    for fmt in [
+        "%Y-%m-%dT%H:%M:%S%z",
+        "%Y-%m-%dT%H:%M:%SZ",
+        "%Y-%m-%dT%H:%M:%S.%f%z",
+        "%Y-%m-%dT%H:%M:%S.%fZ",
+        "%Y-%m-%d %H:%M:%S",
+        "%Y-%m-%d",
+    ]:
+        try:
+            parsed = datetime.strptime(date_str, fmt)
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.astimezone(timezone.utc)
+        except ValueError:
+            continue
+
+    # Try ISO format with fromisoformat (handles +00:00 etc.)
+    try:
+        parsed = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
+    except (ValueError, TypeError):
+        pass
+
+    return None
+
+
+# --- Feeds ---
+
+def parse_rss(xml_bytes, source_name, cutoff=None):
+    """Parse RSS/Atom feed XML into stories, dropping ones dated before cutoff."""
+    stories = []
+    if not xml_bytes:
+        return stories
+
+    # Single streaming pass: each RSS item / Atom entry is turned into a story
+    # on its end event and then cleared, so the full tree is never built.
+    # RSS items take precedence over Atom entries.
+    rss_stories = []
+    atom_stories = []
+    has_items = False
+    try:
+        for _, elem in iterparse(io.BytesIO(xml_bytes)):
+            if elem.tag == "item":
+                has_items = True
+                story = _rss_item_story(elem, source_name, cutoff)
+                if story:
+                    rss_stories.append(story)
+            elif elem.tag == ATOM_ENTRY:
+                story = _atom_entry_story(elem, source_name, cutoff)
+                if story:
+                    atom_stories.append(story)
+            else:
+                continue
+            elem.clear()
+    except XMLParseError:
+        return stories
+
+    return rss_stories if has_items else atom_stories
+
+
+def _rss_item_story(item, source_name, cutoff):
+    title = item.findtext("title", "").strip()
+    link = item.findtext("link", "").strip()
+    desc = unescape(item.findtext("description", "").strip())
+    pub_date_str = item.findtext("pubDate", "")
+
+    # Clean HTML from description
+    desc = TAG_RE.sub("", desc)[:300]
+
+    # Parse and filter by cutoff
+    pub_date = parse_date(pub_date_str)
+    if cutoff and pub_date and pub_date < cutoff:
+        return None  # Skip items older than cutoff
+
+    if not (title and link):
+        return None
+    return Story(
+        title=title,
+        url=link,
+        summary=desc,
+        source=source_name,
+        date=pub_date.isoformat() if pub_date else "",
+    )
+
+
+def _atom_entry_story(entry, source_name, cutoff):
+    title_el = entry.find(ATOM_TITLE)
+    link_el = entry.find(ATOM_LINK)
+    summary_el = entry.find(ATOM_SUMMARY)
+
+    # Try multiple date fields for Atom
+    date_str = ""
+    for date_tag in (ATOM_PUBLISHED, ATOM_UPDATED):
+        date_el = entry.find(date_tag)
+        if date_el is not None and date_el.text:
+            date_str = date_el.text.strip()
+            break
+
+    title = title_el.text.strip() if title_el is not None and title_el.text else ""
+    link = link_el.get("href", "") if link_el is not None else ""
+    summary = summary_el.text.strip() if summary_el is not None and summary_el.text else ""
+    summary = TAG_RE.sub("", unescape(summary))[:300]
+
+    # Parse and filter by cutoff
+    pub_date = parse_date(date_str)
+    if cutoff and pub_date and pub_date < cutoff:
+        return None  # Skip items older than cutoff
+
+    if not (title and link):
+        return None
+    return Story(
+        title=title,
+        url=link,
+        summary=summary,
+        source=source_name,
+        date=pub_date.isoformat() if pub_date else "",
+    )
+
+
+def fetch_rss_feeds(pool, feeds, cutoff=None):
+    """Fetch and parse every {name: url} feed on pool; stories come in completion order."""
+    all_stories = []
+
+    def fetch_one(name, url):
+        print(f"  Fetching {name}...", file=sys.stderr)
+        data = fetch_url(url)
+        return parse_rss(data, name, cutoff)
+
+    futures = [pool.submit(fetch_one, name, url) for name, url in feeds.items()]
+    for future in as_completed(futures):
+        all_stories.extend(future.result())
+
+    print(f"  Found {len(all_stories)} stories from RSS feeds", file=sys.stderr)
+    return all_stories
+
+
+# --- Output Formatting ---
+
+def format_markdown(stories, hours, title, headings, source_group, default_heading=None, source_count=None):
+    """Format stories as a markdown digest.
+
+    headings lists the sections in output order and source_group maps a story
+    source to its heading. Stories from any other source go under
+    default_heading, or are left out when it is None.
+    """
+    now = datetime.now(timezone.utc)
+    date_str = now.strftime("%Y-%m-%d")
+
+    buf = io.StringIO()
+    w = buf.write
+    w(f"# {title} — {date_str}\n"
+      f"*Covering the last {hours} hours • Generated {now.strftime('%H:%M UTC')}*\n\n")
+
+    groups = {heading: [] for heading in headings}
+    for s in stories:
+        heading = source_group.get(s.source, default_heading)
+        if heading is not None:
+            groups[heading].append(s)
+
+    for heading, items in groups.items():
+        if not items:
+            continue
+        w(f"## {heading}\n\n")
+        for i, s in enumerate(items[:15], 1):
+            w(f"**{i}. [{s.title}]({s.url})**\n")
+            if s.summary:
+                w(f"   {s.summary[:200]}\n")
+            w(f"   *Source: {s.source}*\n\n")
+        w("---\n\n")
+
+    total = sum(len(v) for v in groups.values())
+    if source_count is None:
+        w(f"*{total} stories collected*")
+    else:
+        w(f"*{total} stories collected from {source_count} sources*")
+    return buf.getvalue()
+
+
+def format_json(stories, hours):
+    """Format stories as JSON."""
+    return json_dumps({
+        "generated": datetime.now(timezone.utc).isoformat(),
+        "hours": hours,
+        "total": len(stories),
+        "stories": [s.to_dict() for s in stories],
+    })
@@ -6,23 +6,28 @@ Usage:
     python3 fetch_news.py [--hours 24] [--max 30] [--format markdown|json]
 
 Sources:
-    - Hacker News (AI-filtered top/best stories)
+    - Hacker News (AI-filtered top stories of the window via Algolia, firebase top/best as fallback)
     - Arxiv (cs.AI, cs.LG, cs.CL new submissions)
     - RSS feeds (major AI labs, tech publications)
 """
 
 import argparse
-import email.utils
-import json
-import re
+import os
 import sys
-import urllib.request
-import urllib.error
-import xml.etree.ElementTree as ET
+import urllib.parse
 from datetime import datetime, timedelta, timezone
-from html import unescape
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# Source-agnostic fetch/parse/format helpers are shared with the other news
+# skills; see skills/_shared/newsfetch.py.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "_shared"))
+import newsfetch
+from newsfetch import (
+    ATOM_CATEGORY, ATOM_ENTRY, ATOM_ID, ATOM_PUBLISHED, ATOM_SUMMARY, ATOM_TITLE,
+    Story, XMLParseError, dedupe_stories, fetch_url, fetch_url_stream, host_pool,
+    iterparse, json_loads, keyword_pattern, matches_keywords,
+)
+
 # --- Configuration ---
 
 AI_KEYWORDS = [
@@ -54,8 +59,8 @@ RSS_FEEDS = {
     "Techmeme": "https://www.techmeme.com/feed.xml",
     "The Verge AI": "https://www.theverge.com/rss/ai-artificial-intelligence/index.xml",
     "TechCrunch AI": "https://techcrunch.com/category/artificial-intelligence/feed/",
-    "Ars Technica AI": "https://feeds.arstechnica.com/arstechnica/technology-lab",
-    "MIT Tech Review AI": "https://www.technologyreview.com/feed/",
+    "Ars Technica AI": "https://arstechnica.com/ai/feed/",
+    "MIT Tech Review AI": "https://www.technologyreview.com/topic/artificial-intelligence/feed",
     "Hugging Face Blog": "https://huggingface.co/blog/feed.xml",
     "Latent Space (swyx)": "https://www.latent.space/feed",
     "Simon Willison": "https://simonwillison.net/atom/everything/",
@@ -71,214 +76,138 @@ RSS_FEEDS = {
 
 ARXIV_CATEGORIES = ["cs.AI", "cs.LG", "cs.CL"]
 
-# --- Helpers ---
+HN_HOST = "hacker-news.firebaseio.com"
+HN_ALGOLIA_URL = "https://hn.algolia.com/api/v1/search"
 
-def fetch_url(url, timeout=15):
-    """Fetch URL content, return bytes or None on failure."""
-    try:
-        req = urllib.request.Request(url, headers={
-            "User-Agent": "Mozilla/5.0 (compatible; AINewsBot/1.0)"
-        })
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return resp.read()
-    except Exception as e:
-        print(f"  [warn] Failed to fetch {url}: {e}", file=sys.stderr)
-        return None
+# --- HTTP ---
 
+USER_AGENT = "Mozilla/5.0 (compatible; AINewsBot/1.0)"
+# Threads shared by every fetch phase in main().
+FETCH_WORKERS = 32
 
-def is_ai_related(title, summary=""):
-    """Check if a story is AI-related based on keywords."""
-    text = f"{title} {summary}".lower()
-    return any(kw in text for kw in AI_KEYWORDS)
+newsfetch.USER_AGENT = USER_AGENT
+# Idle keep-alive connections kept per host; one per fetch worker.
+newsfetch.POOL_SIZE = FETCH_WORKERS
 
 
-def parse_date(date_str):
-    """Parse a date string in various formats. Returns datetime (UTC) or None."""
-    if not date_str or not date_str.strip():
-        return None
-    date_str = date_str.strip()
+# --- Helpers ---
 
-    # Try RFC 2822 (RSS pubDate format: "Sat, 04 Oct 2025 17:45:00 GMT")
-    try:
-        parsed = email.utils.parsedate_to_datetime(date_str)
-        if parsed.tzinfo is None:
-            parsed = parsed.replace(tzinfo=timezone.utc)
-        return parsed.astimezone(timezone.utc)
-    except (ValueError, TypeError):
-        pass
-
-    # Try ISO 8601 variants
-    for fmt in [
-        "%Y-%m-%dT%H:%M:%S%z",
-        "%Y-%m-%dT%H:%M:%SZ",
-        "%Y-%m-%dT%H:%M:%S.%f%z",
-        "%Y-%m-%dT%H:%M:%S.%fZ",
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%d",
-    ]:
-        try:
-            parsed = datetime.strptime(date_str, fmt)
-            if parsed.tzinfo is None:
-                parsed = parsed.replace(tzinfo=timezone.utc)
-            return parsed.astimezone(timezone.utc)
-        except ValueError:
-            continue
+_AI_KEYWORDS_RE = keyword_pattern(AI_KEYWORDS)
 
-    # Try ISO format with fromisoformat (handles +00:00 etc.)
-    try:
-        parsed = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-        if parsed.tzinfo is None:
-            parsed = parsed.replace(tzinfo=timezone.utc)
-        return parsed.astimezone(timezone.utc)
-    except (ValueError, TypeError):
-        pass
 
-    return None
+def is_ai_related(title, summary=""):
+    """Check if a story is AI-related based on keywords."""
+    return matches_keywords(_AI_KEYWORDS_RE, title, summary)
 
 
-def parse_rss(xml_bytes, source_name, cutoff):
-    """Parse RSS/Atom feed XML and return list of story dicts."""
-    stories = []
-    if not xml_bytes:
-        return stories
+# --- Source Fetchers ---
 
+def _hn_algolia_items(cutoff, max_stories):
+    """Top stories since cutoff from the Algolia HN search API, or None on failure."""
+    # With an empty query Algolia ranks by points, and one response carries
+    # title/url/score for the whole window instead of one round-trip per item.
+    query = urllib.parse.urlencode({
+        "tags": "story",
+        "numericFilters": f"created_at_i>{int(cutoff.timestamp())}",
+        "hitsPerPage": min(max_stories, 1000),
+    })
+    # The query embeds the cutoff timestamp, so it never repeats; don't cache it.
+    data = fetch_url(f"{HN_ALGOLIA_URL}?{query}", cache=False)
+    if not data:
+        return None
     try:
-        root = ET.fromstring(xml_bytes)
-    except ET.ParseError:
-        return stories
-
-    # Handle both RSS and Atom namespaces
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
-
-    # Try RSS 2.0 format
-    items = root.findall(".//item")
-    if items:
-        for item in items:
-            title = item.findtext("title", "").strip()
-            link = item.findtext("link", "").strip()
-            desc = unescape(item.findtext("description", "").strip())
-            pub_date_str = item.findtext("pubDate", "")
-
-            # Clean HTML from description
-            desc = re.sub(r"<[^>]+>", "", desc)[:300]
-
-            # Parse and filter by cutoff
-            pub_date = parse_date(pub_date_str)
-            if pub_date and pub_date < cutoff:
-                continue  # Skip items older than cutoff
-
-            if title and link:
-                stories.append({
-                    "title": title,
-                    "url": link,
-                    "summary": desc,
-                    "source": source_name,
-                    "date": pub_date.isoformat() if pub_date else "",
-                })
-    else:
-        # Try Atom format
-        entries = root.findall(".//atom:entry", ns) or root.findall(".//{http://www.w3.org/2005/Atom}entry")
-        for entry in entries:
-            title_el = entry.find("atom:title", ns)
-            if title_el is None:
-                title_el = entry.find("{http://www.w3.org/2005/Atom}title")
-            link_el = entry.find("atom:link", ns)
-            if link_el is None:
-                link_el = entry.find("{http://www.w3.org/2005/Atom}link")
-            summary_el = entry.find("atom:summary", ns)
-            if summary_el is None:
-                summary_el = entry.find("{http://www.w3.org/2005/Atom}summary")
-
-            # Try multiple date fields for Atom
-            date_str = ""
-            for date_tag in ["atom:published", "atom:updated"]:
-                date_el = entry.find(date_tag, ns)
-                if date_el is None:
-                    date_el = entry.find(date_tag.replace("atom:", "{http://www.w3.org/2005/Atom}"))
-                if date_el is not None and date_el.text:
-                    date_str = date_el.text.strip()
-                    break
-
-            title = title_el.text.strip() if title_el is not None and title_el.text else ""
-            link = link_el.get("href", "") if link_el is not None else ""
-            summary = summary_el.text.strip() if summary_el is not None and summary_el.text else ""
-            summary = re.sub(r"<[^>]+>", "", unescape(summary))[:300]
-
-            # Parse and filter by cutoff
-            pub_date = parse_date(date_str)
-            if pub_date and pub_date < cutoff:
-                continue  # Skip items older than cutoff
-
-            if title and link:
-                stories.append({
-                    "title": title,
-                    "url": link,
-                    "summary": summary,
-                    "source": source_name,
-                    "date": pub_date.isoformat() if pub_date else "",
-                })
+        hits = json_loads(data)["hits"]
+    except (ValueError, KeyError, TypeError):
+        return None
 
-    return stories
+    # Reshape hits like firebase items so both paths share one filter loop.
+    return [
+        {
+            "id": hit.get("objectID"),
+            "type": "story",
+            "title": hit.get("title") or "",
+            "url": hit.get("url") or f"https://news.ycombinator.com/item?id={hit.get('objectID')}",
+            "score": hit.get("points") or 0,
+            "time": hit.get("created_at_i") or 0,
+            "descendants": hit.get("num_comments") or 0,
+        }
+        for hit in hits
+    ]
 
 
-# --- Source Fetchers ---
+def _hn_firebase_items(pool, max_stories):
+    """Yield top/best story items from the firebase API as they arrive."""
+    # Every item request goes to the same host, so look its pool up once and
+    # skip fetch_url's per-call URL parsing.
+    hn = host_pool("https", HN_HOST)
 
-def fetch_hackernews(cutoff, max_stories=500):
+    def fetch_item(item_id):
+        path = f"/v0/item/{item_id}.json"
+        try:
+            resp, item_data = hn.request(path, timeout=10)
+        except Exception as e:
+            print(f"  [warn] Failed to fetch https://{HN_HOST}{path}: {e}", file=sys.stderr)
+            return None
+        if resp.status != 200:
+            print(f"  [warn] Failed to fetch https://{HN_HOST}{path}: HTTP {resp.status}", file=sys.stderr)
+            return None
+        return json_loads(item_data)
+
+    def fetch_ids(endpoint):
+        data = fetch_url(f"https://{HN_HOST}/v0/{endpoint}.json", cache=False)
+        return json_loads(data)[:max_stories] if data else []
+
+    # Top and best overlap heavily; fan out once over their union so each
+    # item is fetched a single time.
+    ids = {}
+    for endpoint_ids in pool.map(fetch_ids, ["topstories", "beststories"]):
+        ids.update(dict.fromkeys(endpoint_ids))
+
+    futures = [pool.submit(fetch_item, sid) for sid in ids]
+    for future in as_completed(futures):
+        yield future.result()
+
+
+def fetch_hackernews(pool, cutoff, max_stories=500):
     """Fetch AI-related stories from Hacker News."""
     print("  Fetching Hacker News...", file=sys.stderr)
     stories = []
 
-    # Get top and best story IDs
-    for endpoint in ["topstories", "beststories"]:
-        data = fetch_url(f"https://hacker-news.firebaseio.com/v0/{endpoint}.json")
-        if not data:
-            continue
+    items = _hn_algolia_items(cutoff, max_stories)
+    if items is None:
+        print("  [warn] Algolia HN search unavailable, falling back to firebase", file=sys.stderr)
+        items = _hn_firebase_items(pool, max_stories)
 
-        ids = json.loads(data)[:max_stories]
-
-        def fetch_item(item_id):
-            item_data = fetch_url(f"https://hacker-news.firebaseio.com/v0/item/{item_id}.json")
-            if not item_data:
-                return None
-            return json.loads(item_data)
-
-        with ThreadPoolExecutor(max_workers=20) as pool:
-            futures = {pool.submit(fetch_item, sid): sid for sid in ids}
-            for future in as_completed(futures):
-                item = future.result()
-                if not item or item.get("type") != "story":
-                    continue
+    # Compare raw epoch seconds; only kept stories get a datetime.
+    cutoff_ts = cutoff.timestamp()
+    for item in items:
+        if not item or item.get("type") != "story":
+            continue
 
-                title = item.get("title", "")
-                url = item.get("url", f"https://news.ycombinator.com/item?id={item['id']}")
-                score = item.get("score", 0)
-                ts = item.get("time", 0)
+        title = item.get("title", "")
+        url = item.get("url", f"https://news.ycombinator.com/item?id={item['id']}")
+        score = item.get("score", 0)
+        ts = item.get("time", 0)
 
-                # Filter by time
-                item_time = datetime.fromtimestamp(ts, tz=timezone.utc)
-                if item_time < cutoff:
-                    continue
+        # Filter by time
+        if ts < cutoff_ts:
+            continue
 
-                if is_ai_related(title):
-                    stories.append({
-                        "title": title,
-                        "url": url,
-                        "summary": f"Score: {score} | Comments: {item.get('descendants', 0)}",
-                        "source": "Hacker News",
-                        "date": item_time.isoformat(),
-                        "score": score,
-                    })
+        if is_ai_related(title):
+            stories.append(Story(
+                title=title,
+                url=url,
+                summary=f"Score: {score} | Comments: {item.get('descendants', 0)}",
+                source="Hacker News",
+                date=datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+                score=score,
+            ))
 
     # Deduplicate by URL
-    seen = set()
-    unique = []
-    for s in stories:
-        if s["url"] not in seen:
-            seen.add(s["url"])
-            unique.append(s)
+    unique = dedupe_stories(stories)
 
     # Sort by score
-    unique.sort(key=lambda x: x.get("score", 0), reverse=True)
+    unique.sort(key=lambda x: x.score or 0, reverse=True)
     print(f"  Found {len(unique)} AI stories on HN", file=sys.stderr)
     return unique
 
@@ -291,127 +220,77 @@ def fetch_arxiv(cutoff, max_results=30):
     cats = "+OR+".join(f"cat:{c}" for c in ARXIV_CATEGORIES)
     url = f"http://export.arxiv.org/api/query?search_query={cats}&sortBy=submittedDate&sortOrder=descending&max_results={max_results}"
 
-    data = fetch_url(url, timeout=30)
-    if not data:
-        return stories
-
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
-    try:
-        root = ET.fromstring(data)
-    except ET.ParseError:
+    resp = fetch_url_stream(url, timeout=30)
+    if resp is None:
         return stories
 
-    for entry in root.findall("atom:entry", ns):
-        title = entry.findtext("atom:title", "", ns).strip().replace("\n", " ")
-        link_el = entry.find("atom:id", ns)
-        link = link_el.text.strip() if link_el is not None else ""
-        summary = entry.findtext("atom:summary", "", ns).strip().replace("\n", " ")[:300]
-
-        # Get categories
-        categories = [c.get("term", "") for c in entry.findall("atom:category", ns)]
-        cat_str = ", ".join(categories[:3])
-
-        stories.append({
-            "title": title,
-            "url": link,
-            "summary": f"[{cat_str}] {summary}",
-            "source": "arxiv",
-            "date": entry.findtext("atom:published", "", ns),
-        })
+    # Entries are parsed straight off the socket and cleared as they complete,
+    # so the response is never buffered whole.
+    with resp:
+        try:
+            for _, entry in iterparse(resp):
+                if entry.tag != ATOM_ENTRY:
+                    continue
+                title = entry.findtext(ATOM_TITLE, "").strip().replace("\n", " ")
+                link_el = entry.find(ATOM_ID)
+                link = link_el.text.strip() if link_el is not None else ""
+                summary = entry.findtext(ATOM_SUMMARY, "").strip().replace("\n", " ")[:300]
+
+                # Get categories
+                categories = [c.get("term", "") for c in entry.findall(ATOM_CATEGORY)]
+                cat_str = ", ".join(categories[:3])
+
+                stories.append(Story(
+                    title=title,
+                    url=link,
+                    summary=f"[{cat_str}] {summary}",
+                    source="arxiv",
+                    date=entry.findtext(ATOM_PUBLISHED, ""),
+                ))
+                entry.clear()
+        except XMLParseError:
+            return []
+        except Exception as e:
+            # Reads happen inside iterparse, so socket and HTTP errors
+            # (IncompleteRead etc.) surface here rather than in fetch_url_stream.
+            print(f"  [warn] Failed to fetch {url}: {e}", file=sys.stderr)
+            return []
 
     print(f"  Found {len(stories)} papers on arxiv", file=sys.stderr)
     return stories
 
 
-def fetch_rss_feeds(cutoff):
+def fetch_rss_feeds(pool, cutoff):
     """Fetch stories from all configured RSS feeds."""
-    all_stories = []
-
-    def fetch_one(name, url):
-        print(f"  Fetching {name}...", file=sys.stderr)
-        data = fetch_url(url)
-        return parse_rss(data, name, cutoff)
-
-    with ThreadPoolExecutor(max_workers=10) as pool:
-        futures = {pool.submit(fetch_one, name, url): name for name, url in RSS_FEEDS.items()}
-        for future in as_completed(futures):
-            stories = future.result()
-            # For non-AI-specific feeds, filter
-            source = futures[future]
-            if source in ("Ars Technica AI", "MIT Tech Review AI"):
-                stories = [s for s in stories if is_ai_related(s["title"], s["summary"])]
-            all_stories.extend(stories)
-
-    print(f"  Found {len(all_stories)} stories from RSS feeds", file=sys.stderr)
-    return all_stories
+    # Ars Technica and MIT Tech Review are read from their AI topic feeds, so
+    # no feed is keyword-filtered here.
+    return newsfetch.fetch_rss_feeds(pool, RSS_FEEDS, cutoff)
 
 
 # --- Output Formatting ---
 
+# Digest sections in output order, with the sources listed under each.
+DIGEST_GROUPS = {
+    "🔥 Top Stories (Hacker News)": {"Hacker News"},
+    "🏢 AI Lab Announcements": {"OpenAI Blog", "Google AI Blog", "DeepMind Blog", "Meta Engineering (ML)", "Hugging Face Blog"},
+    "✍️ Indie & Newsletters": {"Latent Space (swyx)", "Interconnects (Nathan Lambert)", "Fabricated Knowledge (Doug O'Laughlin)", "Simon Willison", "Sentinel Team", "Peter Steinberger", "Armin Ronacher", "Mario Zechner", "SemiAnalysis", "Dwarkesh Patel"},
+    "📰 Tech Press": {"Techmeme", "The Verge AI", "TechCrunch AI", "Ars Technica AI", "MIT Tech Review AI"},
+    "📄 Research Papers (arxiv)": {"arxiv"},
+}
+# Source name -> section heading. Sources in no section are left out of the digest.
+_SOURCE_GROUP = {source: heading for heading, sources in DIGEST_GROUPS.items() for source in sources}
+
 def format_markdown(stories, hours):
     """Format stories as a markdown digest."""
-    now = datetime.now(timezone.utc)
-    date_str = now.strftime("%Y-%m-%d")
-
-    lines = [
-        f"# AI News Digest — {date_str}",
-        f"*Covering the last {hours} hours • Generated {now.strftime('%H:%M UTC')}*",
-        "",
-    ]
-
-    # Group by source type
-    groups = {
-        "🔥 Top Stories (Hacker News)": [],
-        "🏢 AI Lab Announcements": [],
-        "✍️ Indie & Newsletters": [],
-        "📰 Tech Press": [],
-        "📄 Research Papers (arxiv)": [],
-    }
-
-    lab_sources = {"OpenAI Blog", "Google AI Blog", "DeepMind Blog", "Meta Engineering (ML)", "Hugging Face Blog"}
-    indie_sources = {"Latent Space (swyx)", "Interconnects (Nathan Lambert)", "Fabricated Knowledge (Doug O'Laughlin)", "Simon Willison", "Sentinel Team", "Peter Steinberger", "Armin Ronacher", "Mario Zechner", "SemiAnalysis", "Dwarkesh Patel"}
-    press_sources = {"Techmeme", "The Verge AI", "TechCrunch AI", "Ars Technica AI", "MIT Tech Review AI"}
-
-    for s in stories:
-        if s["source"] == "Hacker News":
-            groups["🔥 Top Stories (Hacker News)"].append(s)
-        elif s["source"] in lab_sources:
-            groups["🏢 AI Lab Announcements"].append(s)
-        elif s["source"] in indie_sources:
-            groups["✍️ Indie & Newsletters"].append(s)
-        elif s["source"] in press_sources:
-            groups["📰 Tech Press"].append(s)
-        elif s["source"] == "arxiv":
-            groups["📄 Research Papers (arxiv)"].append(s)
-
-    for heading, items in groups.items():
-        if not items:
-            continue
-        lines.append(f"## {heading}")
-        lines.append("")
-        for i, s in enumerate(items[:15], 1):
-            lines.append(f"**{i}. [{s['title']}]({s['url']})**")
-            if s.get("summary"):
-                lines.append(f"   {s['summary'][:200]}")
-            lines.append(f"   *Source: {s['source']}*")
-            lines.append("")
-        lines.append("---")
-        lines.append("")
-
-    total = sum(len(v) for v in groups.values())
-    lines.append(f"*{total} stories collected from {len(RSS_FEEDS) + 2} sources*")
-
-    return "\n".join(lines)
+    return newsfetch.format_markdown(
+        stories, hours, "AI News Digest", DIGEST_GROUPS, _SOURCE_GROUP,
+        source_count=len(RSS_FEEDS) + 2,
+    )
 
 
 def format_json(stories, hours):
     """Format stories as JSON."""
-    return json.dumps({
-        "generated": datetime.now(timezone.utc).isoformat(),
-        "hours": hours,
-        "total": len(stories),
-        "stories": stories,
-    }, indent=2)
+    return newsfetch.format_json(stories, hours)
 
 
 # --- Main ---
@@ -428,24 +307,20 @@ def main():
 
     all_stories = []
 
-    # Fetch from all sources
-    hn_stories = fetch_hackernews(cutoff, max_stories=args.max * 10)
-    all_stories.extend(hn_stories[:args.max])
-
-    arxiv_stories = fetch_arxiv(cutoff, max_results=args.max)
-    all_stories.extend(arxiv_stories[:args.max])
+    # Fetch from all sources at once on one shared pool. The phase tasks fan
+    # their requests out on the same pool; only those three ever wait on other
+    # futures, far fewer than FETCH_WORKERS, so the fan-out cannot starve.
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        hn_future = pool.submit(fetch_hackernews, pool, cutoff, max_stories=args.max * 10)
+        arxiv_future = pool.submit(fetch_arxiv, cutoff, max_results=args.max)
+        rss_future = pool.submit(fetch_rss_feeds, pool, cutoff)
 
-    rss_stories = fetch_rss_feeds(cutoff)
-    all_stories.extend(rss_stories)
+        all_stories.extend(hn_future.result()[:args.max])
+        all_stories.extend(arxiv_future.result()[:args.max])
+        all_stories.extend(rss_future.result())
 
     # Deduplicate by URL
-    seen = set()
-    unique = []
-    for s in all_stories:
-        url = s["url"].rstrip("/")
-        if url not in seen:
-            seen.add(url)
-            unique.append(s)
+    unique = dedupe_stories(all_stories)
 
     print(f"\nTotal unique stories: {len(unique)}", file=sys.stderr)
 
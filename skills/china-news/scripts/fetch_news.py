@@ -12,15 +12,19 @@ Sources:
 """
 
 import argparse
-import json
-import re
+import os
 import sys
-import urllib.request
-import urllib.error
-import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta, timezone
-from html import unescape
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+
+# Source-agnostic fetch/parse/format helpers are shared with the other news
+# skills; see skills/_shared/newsfetch.py.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "_shared"))
+import newsfetch
+from newsfetch import (
+    ATOM_ENTRY, ATOM_PUBLISHED, ATOM_TITLE, Story, XMLParseError, dedupe_stories,
+    fetch_url, json_loads, keyword_pattern, matches_keywords, xml_fromstring,
+)
 
 # --- Configuration ---
 
@@ -52,66 +56,24 @@ REDDIT_SUBS = {
     "r/worldnews (China)": "https://www.reddit.com/r/worldnews/search.json?q=china+OR+chinese+OR+beijing+OR+xi+jinping+OR+taiwan&sort=relevance&t=day&limit=20",
 }
 
-# --- Helpers ---
+# --- HTTP ---
 
-def fetch_url(url, timeout=15):
-    try:
-        req = urllib.request.Request(url, headers={
-            "User-Agent": "Mozilla/5.0 (compatible; ChinaNewsBot/1.0)"
-        })
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return resp.read()
-    except Exception as e:
-        print(f"  [warn] Failed to fetch {url}: {e}", file=sys.stderr)
-        return None
+USER_AGENT = "Mozilla/5.0 (compatible; ChinaNewsBot/1.0)"
+# Threads shared by every fetch phase in main().
+FETCH_WORKERS = 8
 
+newsfetch.USER_AGENT = USER_AGENT
+# Idle keep-alive connections kept per host; one per fetch worker.
+newsfetch.POOL_SIZE = FETCH_WORKERS
 
-def is_china_related(title, summary=""):
-    text = f"{title} {summary}".lower()
-    return any(kw in text for kw in CHINA_KEYWORDS)
 
+# --- Helpers ---
 
-def parse_rss(xml_bytes, source_name):
-    stories = []
-    if not xml_bytes:
-        return stories
-    try:
-        root = ET.fromstring(xml_bytes)
-    except ET.ParseError:
-        return stories
+_CHINA_KEYWORDS_RE = keyword_pattern(CHINA_KEYWORDS)
 
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
-
-    # RSS 2.0
-    items = root.findall(".//item")
-    if items:
-        for item in items:
-            title = item.findtext("title", "").strip()
-            link = item.findtext("link", "").strip()
-            desc = unescape(item.findtext("description", "").strip())
-            pub_date = item.findtext("pubDate", "")
-            desc = re.sub(r"<[^>]+>", "", desc)[:300]
-            if title and link:
-                stories.append({
-                    "title": title, "url": link, "summary": desc,
-                    "source": source_name, "date": pub_date,
-                })
-    else:
-        # Atom
-        for ns_uri in ["http://www.w3.org/2005/Atom"]:
-            entries = root.findall(f".//{{{ns_uri}}}entry")
-            for entry in entries:
-                title = entry.findtext(f"{{{ns_uri}}}title", "").strip()
-                link_el = entry.find(f"{{{ns_uri}}}link")
-                link = link_el.get("href", "") if link_el is not None else ""
-                summary = entry.findtext(f"{{{ns_uri}}}summary", "").strip()
-                summary = re.sub(r"<[^>]+>", "", unescape(summary))[:300]
-                if title and link:
-                    stories.append({
-                        "title": title, "url": link, "summary": summary,
-                        "source": source_name, "date": "",
-                    })
-    return stories
+
+def is_china_related(title, summary=""):
+    return matches_keywords(_CHINA_KEYWORDS_RE, title, summary)
 
 
 def parse_youtube_feed(xml_bytes, source_name):
@@ -119,59 +81,59 @@ def parse_youtube_feed(xml_bytes, source_name):
     if not xml_bytes:
         return stories
     try:
-        root = ET.fromstring(xml_bytes)
-    except ET.ParseError:
+        root = xml_fromstring(xml_bytes)
+    except XMLParseError:
+        return stories
+    if root is None:  # lxml recover mode found nothing to salvage
         return stories
 
     ns = {
-        "atom": "http://www.w3.org/2005/Atom",
         "yt": "http://www.youtube.com/xml/schemas/2015",
         "media": "http://search.yahoo.com/mrss/",
     }
 
-    for entry in root.findall("atom:entry", ns):
-        title = entry.findtext("atom:title", "", ns).strip()
+    for entry in root.findall(ATOM_ENTRY):
+        title = entry.findtext(ATOM_TITLE, "").strip()
         video_id = entry.findtext("yt:videoId", "", ns).strip()
-        published = entry.findtext("atom:published", "", ns).strip()
+        published = entry.findtext(ATOM_PUBLISHED, "").strip()
         desc_el = entry.find("media:group/media:description", ns)
         desc = desc_el.text.strip()[:300] if desc_el is not None and desc_el.text else ""
 
         if title and video_id:
-            stories.append({
-                "title": title,
-                "url": f"https://www.youtube.com/watch?v={video_id}",
-                "summary": desc,
-                "source": source_name,
-                "date": published,
-                "type": "video",
-            })
+            stories.append(Story(
+                title=title,
+                url=f"https://www.youtube.com/watch?v={video_id}",
+                summary=desc,
+                source=source_name,
+                date=published,
+                type="video",
+            ))
     return stories
 
 
 # --- Source Fetchers ---
 
-def fetch_youtube(cutoff):
+def fetch_youtube(pool, cutoff):
     print("  Fetching YouTube channels...", file=sys.stderr)
     all_stories = []
-    for name, url in YOUTUBE_FEEDS.items():
-        data = fetch_url(url)
+    for name, data in zip(YOUTUBE_FEEDS, pool.map(fetch_url, YOUTUBE_FEEDS.values())):
         stories = parse_youtube_feed(data, name)
         all_stories.extend(stories)
     print(f"  Found {len(all_stories)} videos", file=sys.stderr)
     return all_stories
 
 
-def fetch_reddit(cutoff):
+def fetch_reddit(pool, cutoff):
     print("  Fetching Reddit...", file=sys.stderr)
     all_stories = []
-    for name, url in REDDIT_SUBS.items():
-        data = fetch_url(url)
+    cutoff_ts = cutoff.timestamp()
+    for name, data in zip(REDDIT_SUBS, pool.map(fetch_url, REDDIT_SUBS.values())):
         if not data:
             continue
         try:
-            js = json.loads(data)
+            js = json_loads(data)
             posts = js.get("data", {}).get("children", [])
-        except (json.JSONDecodeError, AttributeError):
+        except (ValueError, AttributeError):
             continue
 
         for post in posts:
@@ -182,97 +144,47 @@ def fetch_reddit(cutoff):
             score = d.get("score", 0)
             created = d.get("created_utc", 0)
 
-            post_time = datetime.fromtimestamp(created, tz=timezone.utc)
-            if post_time < cutoff:
+            if created < cutoff_ts:
                 continue
 
             if "worldnews" in name.lower() or is_china_related(title):
-                all_stories.append({
-                    "title": title,
-                    "url": f"https://reddit.com{permalink}" if permalink else url_link,
-                    "summary": f"Score: {score} | Comments: {d.get('num_comments', 0)}",
-                    "source": name,
-                    "date": post_time.isoformat(),
-                    "score": score,
-                })
-
-    all_stories.sort(key=lambda x: x.get("score", 0), reverse=True)
+                all_stories.append(Story(
+                    title=title,
+                    url=f"https://reddit.com{permalink}" if permalink else url_link,
+                    summary=f"Score: {score} | Comments: {d.get('num_comments', 0)}",
+                    source=name,
+                    date=datetime.fromtimestamp(created, tz=timezone.utc).isoformat(),
+                    score=score,
+                ))
+
+    all_stories.sort(key=lambda x: x.score or 0, reverse=True)
     print(f"  Found {len(all_stories)} China stories on Reddit", file=sys.stderr)
     return all_stories
 
 
-def fetch_rss_feeds(cutoff):
-    all_stories = []
-    def fetch_one(name, url):
-        print(f"  Fetching {name}...", file=sys.stderr)
-        data = fetch_url(url)
-        return parse_rss(data, name)
-
-    with ThreadPoolExecutor(max_workers=5) as pool:
-        futures = {pool.submit(fetch_one, name, url): name for name, url in RSS_FEEDS.items()}
-        for future in as_completed(futures):
-            stories = future.result()
-            all_stories.extend(stories)
-
-    print(f"  Found {len(all_stories)} stories from RSS feeds", file=sys.stderr)
-    return all_stories
+def fetch_rss_feeds(pool, cutoff):
+    return newsfetch.fetch_rss_feeds(pool, RSS_FEEDS)
 
 
 # --- Output Formatting ---
 
-def format_markdown(stories, hours):
-    now = datetime.now(timezone.utc)
-    date_str = now.strftime("%Y-%m-%d")
-
-    lines = [
-        f"# China News Digest — {date_str}",
-        f"*Covering the last {hours} hours • Generated {now.strftime('%H:%M UTC')}*",
-        "",
-    ]
-
-    groups = {
-        "🎥 Commentary (YouTube)": [],
-        "🇨🇳 News": [],
-        "💬 Reddit Discussion": [],
-    }
-
-    yt_sources = set(YOUTUBE_FEEDS.keys())
-    reddit_sources = set(REDDIT_SUBS.keys())
-
-    for s in stories:
-        if s["source"] in yt_sources:
-            groups["🎥 Commentary (YouTube)"].append(s)
-        elif s["source"] in reddit_sources:
-            groups["💬 Reddit Discussion"].append(s)
-        else:
-            groups["🇨🇳 News"].append(s)
+# Digest sections in output order.
+DIGEST_HEADINGS = ["🎥 Commentary (YouTube)", "🇨🇳 News", "💬 Reddit Discussion"]
+# Source name -> digest section; everything else is filed under News.
+_SOURCE_GROUP = {
+    **{name: "💬 Reddit Discussion" for name in REDDIT_SUBS},
+    **{name: "🎥 Commentary (YouTube)" for name in YOUTUBE_FEEDS},
+}
 
-    for heading, items in groups.items():
-        if not items:
-            continue
-        lines.append(f"## {heading}")
-        lines.append("")
-        for i, s in enumerate(items[:15], 1):
-            lines.append(f"**{i}. [{s['title']}]({s['url']})**")
-            if s.get("summary"):
-                lines.append(f"   {s['summary'][:200]}")
-            lines.append(f"   *Source: {s['source']}*")
-            lines.append("")
-        lines.append("---")
-        lines.append("")
-
-    total = sum(len(v) for v in groups.values())
-    lines.append(f"*{total} stories collected*")
-    return "\n".join(lines)
+def format_markdown(stories, hours):
+    return newsfetch.format_markdown(
+        stories, hours, "China News Digest", DIGEST_HEADINGS, _SOURCE_GROUP,
+        default_heading="🇨🇳 News",
+    )
 
 
 def format_json(stories, hours):
-    return json.dumps({
-        "generated": datetime.now(timezone.utc).isoformat(),
-        "hours": hours,
-        "total": len(stories),
-        "stories": stories,
-    }, indent=2)
+    return newsfetch.format_json(stories, hours)
 
 
 # --- Main ---
@@ -288,18 +200,20 @@ def main():
     print(f"Fetching China news from the last {args.hours} hours...", file=sys.stderr)
 
     all_stories = []
-    all_stories.extend(fetch_youtube(cutoff))
-    all_stories.extend(fetch_reddit(cutoff))
-    all_stories.extend(fetch_rss_feeds(cutoff))
+    # All sources run at once on one shared pool. The phase tasks fan their
+    # requests out on the same pool; only those three ever wait on other
+    # futures, fewer than FETCH_WORKERS, so the fan-out cannot starve.
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        youtube_future = pool.submit(fetch_youtube, pool, cutoff)
+        reddit_future = pool.submit(fetch_reddit, pool, cutoff)
+        rss_future = pool.submit(fetch_rss_feeds, pool, cutoff)
+
+        all_stories.extend(youtube_future.result())
+        all_stories.extend(reddit_future.result())
+        all_stories.extend(rss_future.result())
 
     # Deduplicate by URL
-    seen = set()
-    unique = []
-    for s in all_stories:
-        url = s["url"].rstrip("/")
-        if url not in seen:
-            seen.add(url)
-            unique.append(s)
+    unique = dedupe_stories(all_stories)
 
     print(f"\nTotal unique stories: {len(unique)}", file=sys.stderr)
 
@@ -3,7 +3,7 @@
 Metal News Fetcher — Gathers nonferrous metals news from CNIA (cnmn.com.cn) and Reddit.
 
 Usage:
-    python3 fetch_news.py [--hours 48] [--max 200] [--format json]
+    python3 fetch_news.py [--hours 48] [--max 200] [--format json] [--new-only]
 
 Sources:
     - cnmn.com.cn (中国有色网 — CNIA official media outlet)
@@ -11,16 +11,27 @@ Sources:
 """
 
 import argparse
-import hashlib
-import json
+import itertools
+import os
 import re
 import sys
-import urllib.request
-import urllib.error
 from datetime import datetime, timedelta, timezone
 from html import unescape
+from operator import itemgetter
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# HTTP, dedupe and item-ID helpers are shared with the other news skills;
+# see skills/_shared/newsfetch.py.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "_shared"))
+import newsfetch
+from newsfetch import dedupe_by_key, fetch_url, json_dumps, json_loads, make_item_id, seen_filter
+
+newsfetch.USER_AGENT = "Mozilla/5.0 (compatible; MetalNewsBot/1.0)"
+# Threads shared by every fetch phase in main().
+FETCH_WORKERS = 8
+# Idle keep-alive connections kept per host; one per fetch worker.
+newsfetch.POOL_SIZE = FETCH_WORKERS
+
 
 # --- CNIA Sections ---
 
@@ -34,6 +45,9 @@ CNMN_SECTIONS = {
     "贵金属 (Precious)": "https://www.cnmn.com.cn/metal.aspx?id=87",
     "市场行情 (Market)": "https://www.cnmn.com.cn/NewsMarket.aspx",
 }
+# The section pages send no ETag/Last-Modified, so they can't be revalidated;
+# a copy younger than this is reused instead of fetched again.
+CNMN_MAX_AGE = 900
 
 REDDIT_SUBREDDITS = [
     "Copper",
@@ -53,38 +67,32 @@ METAL_KEYWORDS = [
     "钼", "钛", "稀土", "锂", "贵金属", "有色金属", "冶炼",
 ]
 
-
-def fetch_url(url, timeout=15):
-    try:
-        req = urllib.request.Request(url, headers={
-            "User-Agent": "Mozilla/5.0 (compatible; MetalNewsBot/1.0)"
-        })
-        return urllib.request.urlopen(req, timeout=timeout).read()
-    except Exception as e:
-        print(f"  [warn] fetch failed {url}: {e}", file=sys.stderr)
-        return None
-
-
-def make_item_id(source, unique_part):
-    h = hashlib.md5(f"{source}:{unique_part}".encode()).hexdigest()[:16]
-    return h
+# Article links on CNIA section pages: href="/ShowNews1.aspx?id=XXXXX">Title</a>
+# Matched on the raw page bytes; the link text is captured whole (leading
+# whitespace included) and decoded on its own.
+_CNMN_RE = re.compile(rb'href="(/ShowNews1\.aspx\?id=(\d+))"[^>]*>([^<]{3,})')
 
 
 # --- CNIA Scraper ---
 
 def scrape_cnmn_section(section_name, url):
     """Scrape article links + titles from a CNIA section page."""
-    data = fetch_url(url)
+    data = fetch_url(url, max_age=CNMN_MAX_AGE)
     if not data:
         return []
-    text = data.decode("utf-8", errors="replace")
-    # Match: href="/ShowNews1.aspx?id=XXXXX">Title</a>
-    pattern = r'href="(/ShowNews1\.aspx\?id=(\d+))"[^>]*>\s*([^<]{3,})'
-    matches = re.findall(pattern, text)
     items = []
     seen_ids = set()
-    for href, article_id, title in matches:
-        title = unescape(title.strip().replace("&nbsp;", " "))
+    # The list pages carry no dates; every item is stamped with the scrape time.
+    now_iso = datetime.now(timezone.utc).isoformat()
+    for href, article_id, title in _CNMN_RE.findall(data):
+        title = title.decode("utf-8", errors="replace")
+        if len(title) < 3:  # {3,} counted bytes; titles need 3 characters
+            continue
+        title = title.strip()
+        href = href.decode("ascii")
+        article_id = article_id.decode("ascii")
+        if "&" in title:  # most listing titles carry no entities
+            title = unescape(title).replace("\xa0", " ")
         if not title or article_id in seen_ids:
             continue
         seen_ids.add(article_id)
@@ -94,75 +102,83 @@ def scrape_cnmn_section(section_name, url):
             "source_item_id": make_item_id("cnmn", article_id),
             "title": title,
             "url": full_url,
-            "published_at": datetime.now(timezone.utc).isoformat(),
+            "published_at": now_iso,
             "section": section_name,
         })
     return items
 
 
-def fetch_cnmn(max_per_section=30):
+def fetch_cnmn(pool, max_per_section=30):
     """Fetch articles from all CNIA sections in parallel."""
     all_items = []
     seen_ids = set()
-    with ThreadPoolExecutor(max_workers=6) as pool:
-        futures = {
-            pool.submit(scrape_cnmn_section, name, url): name
-            for name, url in CNMN_SECTIONS.items()
-        }
-        for future in as_completed(futures):
-            name = futures[future]
-            try:
-                items = future.result()
-                for item in items[:max_per_section]:
-                    if item["source_item_id"] not in seen_ids:
-                        seen_ids.add(item["source_item_id"])
-                        all_items.append(item)
-                print(f"  [cnmn] {name}: {len(items)} articles", file=sys.stderr)
-            except Exception as e:
-                print(f"  [warn] {name} failed: {e}", file=sys.stderr)
+    futures = {
+        pool.submit(scrape_cnmn_section, name, url): name
+        for name, url in CNMN_SECTIONS.items()
+    }
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            items = future.result()
+            for item in items[:max_per_section]:
+                if item["source_item_id"] not in seen_ids:
+                    seen_ids.add(item["source_item_id"])
+                    all_items.append(item)
+            print(f"  [cnmn] {name}: {len(items)} articles", file=sys.stderr)
+        except Exception as e:
+            print(f"  [warn] {name} failed: {e}", file=sys.stderr)
     return all_items
 
 
 # --- Reddit Scraper ---
 
-def fetch_reddit(subreddits, hours=48, max_per_sub=25):
+def _fetch_one_subreddit(sub, cutoff, max_per_sub):
+    """Fetch recent posts from one subreddit's /new listing."""
+    url = f"https://www.reddit.com/r/{sub}/new.json?limit=50"
+    data = fetch_url(url)
+    if not data:
+        return []
+    try:
+        listing = json_loads(data)
+        posts = listing.get("data", {}).get("children", [])
+    except (ValueError, KeyError):  # orjson and json decode errors are ValueErrors
+        return []
+    items = []
+    cutoff_ts = cutoff.timestamp()
+    for post in posts:
+        d = post.get("data", {})
+        created_utc = d.get("created_utc", 0)
+        if created_utc < cutoff_ts:
+            break  # /new is newest first; everything after this is older
+        title = d.get("title", "").strip()
+        if not title:
+            continue
+        created = datetime.fromtimestamp(created_utc, tz=timezone.utc)
+        post_url = d.get("url", "")
+        permalink = f"https://www.reddit.com{d.get('permalink', '')}"
+        items.append({
+            "source": "reddit",
+            "source_item_id": make_item_id("reddit", d.get("id", "")),
+            "title": title,
+            "url": post_url if post_url and not post_url.startswith("https://www.reddit.com") else permalink,
+            "published_at": created.isoformat(),
+            "score": d.get("score", 0),
+            "num_comments": d.get("num_comments", 0),
+            "subreddit": sub,
+        })
+        if len(items) >= max_per_sub:
+            break
+    print(f"  [reddit] r/{sub}: {len(items)} posts", file=sys.stderr)
+    return items
+
+
+def fetch_reddit(pool, subreddits, hours=48, max_per_sub=25):
+    """Fetch all subreddits in parallel; items keep the subreddits' order."""
     cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
     all_items = []
-    for sub in subreddits:
-        url = f"https://www.reddit.com/r/{sub}/new.json?limit=50"
-        data = fetch_url(url)
-        if not data:
-            continue
-        try:
-            listing = json.loads(data)
-            posts = listing.get("data", {}).get("children", [])
-        except (json.JSONDecodeError, KeyError):
-            continue
-        count = 0
-        for post in posts:
-            d = post.get("data", {})
-            created = datetime.fromtimestamp(d.get("created_utc", 0), tz=timezone.utc)
-            if created < cutoff:
-                continue
-            title = d.get("title", "").strip()
-            if not title:
-                continue
-            post_url = d.get("url", "")
-            permalink = f"https://www.reddit.com{d.get('permalink', '')}"
-            all_items.append({
-                "source": "reddit",
-                "source_item_id": make_item_id("reddit", d.get("id", "")),
-                "title": title,
-                "url": post_url if post_url and not post_url.startswith("https://www.reddit.com") else permalink,
-                "published_at": created.isoformat(),
-                "score": d.get("score", 0),
-                "num_comments": d.get("num_comments", 0),
-                "subreddit": sub,
-            })
-            count += 1
-            if count >= max_per_sub:
-                break
-        print(f"  [reddit] r/{sub}: {count} posts", file=sys.stderr)
+    futures = [pool.submit(_fetch_one_subreddit, sub, cutoff, max_per_sub) for sub in subreddits]
+    for future in futures:
+        all_items.extend(future.result())
     return all_items
 
 
@@ -173,49 +189,60 @@ def main():
     parser.add_argument("--hours", type=int, default=48, help="Lookback window for Reddit (default: 48)")
     parser.add_argument("--max", type=int, default=200, help="Max total items (default: 200)")
     parser.add_argument("--format", choices=["json", "markdown"], default="json", help="Output format")
+    parser.add_argument("--new-only", action="store_true",
+                        help="Skip items emitted by a --new-only run in the last 7 days")
     args = parser.parse_args()
 
     print(f"Fetching metal news (Reddit lookback: {args.hours}h)...", file=sys.stderr)
 
-    # Fetch all sources
-    cnmn_items = fetch_cnmn()
-    reddit_items = fetch_reddit(REDDIT_SUBREDDITS, hours=args.hours)
-
-    all_items = cnmn_items + reddit_items
-
-    # Deduplicate by source_item_id
-    seen = set()
-    unique = []
-    for item in all_items:
-        sid = item["source_item_id"]
-        if sid not in seen:
-            seen.add(sid)
-            unique.append(item)
-
-    # Trim to max
-    unique = unique[: args.max]
+    # Both sources run at once on one shared pool. The two phase tasks fan
+    # their requests out on the same pool; only they ever wait on other
+    # futures, fewer than FETCH_WORKERS, so the fan-out cannot starve.
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        cnmn_future = pool.submit(fetch_cnmn, pool)
+        reddit_future = pool.submit(fetch_reddit, pool, REDDIT_SUBREDDITS, hours=args.hours)
+        cnmn_items = cnmn_future.result()
+        reddit_items = reddit_future.result()
+
+    # Deduplicate by source_item_id (and with --new-only against earlier
+    # runs), stopping once max items are in
+    emitted = seen_filter("metal-news") if args.new_only else None
+    items = itertools.chain(cnmn_items, reddit_items)
+    if emitted is not None:
+        items = (item for item in items if item["source_item_id"] not in emitted)
+    unique = dedupe_by_key(items, itemgetter("source_item_id"), limit=args.max)
 
     print(f"Total: {len(unique)} items ({len(cnmn_items)} CNIA, {len(reddit_items)} Reddit)", file=sys.stderr)
 
+    now = datetime.now(timezone.utc)
     if args.format == "json":
         output = {
             "collection": "metal_news",
-            "fetched_at": datetime.now(timezone.utc).isoformat(),
+            "fetched_at": now.isoformat(),
             "item_count": len(unique),
             "items": unique,
         }
-        json.dump(output, sys.stdout, ensure_ascii=False, indent=2)
-        sys.stdout.write("\n")
+        print(json_dumps(output, ensure_ascii=False))
     else:
-        print(f"# Metal News Digest ({datetime.now(timezone.utc).strftime('%Y-%m-%d')})\n")
-        print(f"**{len(unique)} stories** from CNIA and Reddit\n")
+        lines = [
+            f"# Metal News Digest ({now.strftime('%Y-%m-%d')})",
+            "",
+            f"**{len(unique)} stories** from CNIA and Reddit",
+            "",
+        ]
         for item in unique:
             src = item["source"]
             title = item["title"]
             url = item["url"]
             section = item.get("section", "")
             prefix = f"🇨🇳 [{section}]" if src == "cnmn.com.cn" else "💬"
-            print(f"- {prefix} [{title}]({url})")
+            lines.append(f"- {prefix} [{title}]({url})")
+        sys.stdout.write("\n".join(lines) + "\n")
+
+    if emitted is not None:
+        for item in unique:
+            emitted.add(item["source_item_id"])
+        emitted.save()
 
 
 if __name__ == "__main__":
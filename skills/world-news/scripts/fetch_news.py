@@ -3,7 +3,7 @@
 World News Fetcher - Gathers world news from multiple sources and outputs a structured digest.
 
 Usage:
-    python3 fetch_news.py [--hours 24] [--max 30] [--format markdown|json]
+    python3 fetch_news.py [--hours 24] [--max 30] [--format markdown|json] [--new-only]
 
 Sources:
     - Reddit r/worldnews (top posts)
@@ -11,18 +11,31 @@ Sources:
 """
 
 import argparse
-import json
-import re
+import itertools
+import os
 import sys
-import urllib.request
-import urllib.error
-import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta, timezone
 from html import unescape
+from operator import itemgetter
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# HTTP, feed-parsing and dedupe helpers are shared with the other news skills;
+# see skills/_shared/newsfetch.py.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "_shared"))
+import newsfetch
+from newsfetch import (
+    ATOM_ENTRY, ATOM_FEED, ATOM_LINK, ATOM_SUMMARY, ATOM_TITLE, TAG_RE, XMLParseError, dedupe_by_key,
+    fetch_url, json_dumps, json_loads, seen_filter, xml_fromstring,
+)
+
 # --- Configuration ---
 
+newsfetch.USER_AGENT = "Mozilla/5.0 (compatible; WorldNewsBot/1.0)"
+# Threads shared by every fetch phase in main().
+FETCH_WORKERS = 8
+# Idle keep-alive connections kept per host; one per fetch worker.
+newsfetch.POOL_SIZE = FETCH_WORKERS
+
 RSS_FEEDS = {
     "Sentinel Team": "https://sentinelteam.substack.com/feed",
     "Kyla Scanlon": "https://kylascanlon.substack.com/feed",
@@ -30,41 +43,29 @@ RSS_FEEDS = {
 
 # --- Helpers ---
 
-def fetch_url(url, timeout=15):
-    """Fetch URL content, return bytes or None on failure."""
-    try:
-        req = urllib.request.Request(url, headers={
-            "User-Agent": "Mozilla/5.0 (compatible; WorldNewsBot/1.0)"
-        })
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return resp.read()
-    except Exception as e:
-        print(f"  [warn] Failed to fetch {url}: {e}", file=sys.stderr)
-        return None
-
-
 def parse_rss(xml_bytes, source_name):
     """Parse RSS/Atom feed XML and return list of story dicts."""
     stories = []
     if not xml_bytes:
         return stories
 
+    # lxml (recover mode) when installed, stdlib ElementTree otherwise.
     try:
-        root = ET.fromstring(xml_bytes)
-    except ET.ParseError:
+        root = xml_fromstring(xml_bytes)
+    except XMLParseError:
+        return stories
+    if root is None:  # lxml recover mode found nothing to salvage
         return stories
 
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
-
-    # Try RSS 2.0 format
-    items = root.findall(".//item")
+    # Try RSS 2.0 format; an Atom <feed> root can't hold plain <item>s
+    items = root.findall(".//item") if root.tag != ATOM_FEED else []
     if items:
         for item in items:
             title = item.findtext("title", "").strip()
             link = item.findtext("link", "").strip()
             desc = unescape(item.findtext("description", "").strip())
             pub_date = item.findtext("pubDate", "")
-            desc = re.sub(r"<[^>]+>", "", desc)[:300]
+            desc = TAG_RE.sub("", desc)[:300]
 
             if title and link:
                 stories.append({
@@ -76,22 +77,15 @@ def parse_rss(xml_bytes, source_name):
                 })
     else:
         # Try Atom format
-        entries = root.findall("atom:entry", ns) or root.findall("{http://www.w3.org/2005/Atom}entry")
-        for entry in entries:
-            title_el = entry.find("atom:title", ns)
-            if title_el is None:
-                title_el = entry.find("{http://www.w3.org/2005/Atom}title")
-            link_el = entry.find("atom:link", ns)
-            if link_el is None:
-                link_el = entry.find("{http://www.w3.org/2005/Atom}link")
-            summary_el = entry.find("atom:summary", ns)
-            if summary_el is None:
-                summary_el = entry.find("{http://www.w3.org/2005/Atom}summary")
+        for entry in root.iterfind(ATOM_ENTRY):
+            title_el = entry.find(ATOM_TITLE)
+            link_el = entry.find(ATOM_LINK)
+            summary_el = entry.find(ATOM_SUMMARY)
 
             title = title_el.text.strip() if title_el is not None and title_el.text else ""
             link = link_el.get("href", "") if link_el is not None else ""
             summary = summary_el.text.strip() if summary_el is not None and summary_el.text else ""
-            summary = re.sub(r"<[^>]+>", "", unescape(summary))[:300]
+            summary = TAG_RE.sub("", unescape(summary))[:300]
 
             if title and link:
                 stories.append({
@@ -107,63 +101,65 @@ def parse_rss(xml_bytes, source_name):
 
 # --- Source Fetchers ---
 
-def fetch_reddit_worldnews(cutoff, max_stories=50):
-    """Fetch top posts from r/worldnews via JSON API."""
-    print("  Fetching r/worldnews...", file=sys.stderr)
-    stories = []
+def _fetch_worldnews_listing(sort, cutoff):
+    """Fetch one r/worldnews listing ("hot" or "top" of the day)."""
+    params = "?t=day&limit=50" if sort == "top" else "?limit=50"
+    url = f"https://www.reddit.com/r/worldnews/{sort}.json{params}"
+    data = fetch_url(url)
+    if not data:
+        return []
 
-    for sort in ["hot", "top"]:
-        params = "?t=day&limit=50" if sort == "top" else "?limit=50"
-        url = f"https://www.reddit.com/r/worldnews/{sort}.json{params}"
-        data = fetch_url(url)
-        if not data:
-            continue
+    try:
+        listing = json_loads(data)
+    except ValueError:  # orjson and json decode errors are ValueErrors
+        return []
 
-        try:
-            listing = json.loads(data)
-        except json.JSONDecodeError:
+    stories = []
+    cutoff_ts = cutoff.timestamp()
+    for child in listing.get("data", {}).get("children", []):
+        post = child.get("data", {})
+        title = post.get("title", "")
+        permalink = post.get("permalink", "")
+        link_url = post.get("url", "")
+        score = post.get("score", 0)
+        num_comments = post.get("num_comments", 0)
+        created = post.get("created_utc", 0)
+
+        if created < cutoff_ts:
             continue
+        post_time = datetime.fromtimestamp(created, tz=timezone.utc)
+
+        # Use the external link, not reddit permalink
+        url = link_url if link_url and not link_url.startswith("https://www.reddit.com") else f"https://www.reddit.com{permalink}"
+
+        stories.append({
+            "title": title,
+            "url": url,
+            "summary": f"Score: {score} | Comments: {num_comments}",
+            "source": "r/worldnews",
+            "date": post_time.isoformat(),
+            "score": score,
+            "comments_url": f"https://www.reddit.com{permalink}",
+        })
+    return stories
 
-        for child in listing.get("data", {}).get("children", []):
-            post = child.get("data", {})
-            title = post.get("title", "")
-            permalink = post.get("permalink", "")
-            link_url = post.get("url", "")
-            score = post.get("score", 0)
-            num_comments = post.get("num_comments", 0)
-            created = post.get("created_utc", 0)
-
-            post_time = datetime.fromtimestamp(created, tz=timezone.utc)
-            if post_time < cutoff:
-                continue
-
-            # Use the external link, not reddit permalink
-            url = link_url if link_url and not link_url.startswith("https://www.reddit.com") else f"https://www.reddit.com{permalink}"
-
-            stories.append({
-                "title": title,
-                "url": url,
-                "summary": f"Score: {score} | Comments: {num_comments}",
-                "source": "r/worldnews",
-                "date": post_time.isoformat(),
-                "score": score,
-                "comments_url": f"https://www.reddit.com{permalink}",
-            })
-
-    # Deduplicate by URL
-    seen = set()
-    unique = []
-    for s in stories:
-        if s["url"] not in seen:
-            seen.add(s["url"])
-            unique.append(s)
 
+def fetch_reddit_worldnews(pool, cutoff, max_stories=50):
+    """Fetch top posts from r/worldnews via JSON API."""
+    print("  Fetching r/worldnews...", file=sys.stderr)
+    stories = []
+
+    # hot and top are fetched at once; hot stays first so it wins URL dedupe.
+    for listing_stories in pool.map(_fetch_worldnews_listing, ["hot", "top"], [cutoff, cutoff]):
+        stories.extend(listing_stories)
+
+    unique = dedupe_by_key(stories, itemgetter("url"))
     unique.sort(key=lambda x: x.get("score", 0), reverse=True)
     print(f"  Found {len(unique)} posts on r/worldnews", file=sys.stderr)
     return unique
 
 
-def fetch_rss_feeds(cutoff):
+def fetch_rss_feeds(pool, cutoff):
     """Fetch stories from all configured RSS feeds."""
     all_stories = []
 
@@ -172,11 +168,10 @@ def fetch_rss_feeds(cutoff):
         data = fetch_url(url)
         return parse_rss(data, name)
 
-    with ThreadPoolExecutor(max_workers=5) as pool:
-        futures = {pool.submit(fetch_one, name, url): name for name, url in RSS_FEEDS.items()}
-        for future in as_completed(futures):
-            stories = future.result()
-            all_stories.extend(stories)
+    futures = {pool.submit(fetch_one, name, url): name for name, url in RSS_FEEDS.items()}
+    for future in as_completed(futures):
+        stories = future.result()
+        all_stories.extend(stories)
 
     print(f"  Found {len(all_stories)} stories from RSS feeds", file=sys.stderr)
     return all_stories
@@ -233,12 +228,12 @@ def format_markdown(stories, hours):
 
 def format_json(stories, hours):
     """Format stories as JSON."""
-    return json.dumps({
+    return json_dumps({
         "generated": datetime.now(timezone.utc).isoformat(),
         "hours": hours,
         "total": len(stories),
         "stories": stories,
-    }, indent=2)
+    })
 
 
 # --- Main ---
@@ -248,27 +243,28 @@ def main():
     parser.add_argument("--hours", type=int, default=24, help="Look back N hours (default: 24)")
     parser.add_argument("--max", type=int, default=30, help="Max stories per source (default: 30)")
     parser.add_argument("--format", choices=["markdown", "json"], default="markdown", help="Output format")
+    parser.add_argument("--new-only", action="store_true",
+                        help="Skip stories emitted by a --new-only run in the last 7 days")
     args = parser.parse_args()
 
     cutoff = datetime.now(timezone.utc) - timedelta(hours=args.hours)
     print(f"Fetching world news from the last {args.hours} hours...", file=sys.stderr)
 
-    all_stories = []
-
-    reddit_stories = fetch_reddit_worldnews(cutoff, max_stories=args.max * 2)
-    all_stories.extend(reddit_stories[:args.max])
-
-    rss_stories = fetch_rss_feeds(cutoff)
-    all_stories.extend(rss_stories)
-
-    # Deduplicate by URL
-    seen = set()
-    unique = []
-    for s in all_stories:
-        url = s["url"].rstrip("/")
-        if url not in seen:
-            seen.add(url)
-            unique.append(s)
+    # Both sources run at once on one shared pool. The two phase tasks fan
+    # their requests out on the same pool; only they ever wait on other
+    # futures, fewer than FETCH_WORKERS, so the fan-out cannot starve.
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        reddit_future = pool.submit(fetch_reddit_worldnews, pool, cutoff, max_stories=args.max * 2)
+        rss_future = pool.submit(fetch_rss_feeds, pool, cutoff)
+        reddit_stories = reddit_future.result()
+        rss_stories = rss_future.result()
+
+    # Deduplicate by URL, and with --new-only against earlier runs
+    emitted = seen_filter("world-news") if args.new_only else None
+    stories = itertools.chain(reddit_stories[:args.max], rss_stories)
+    if emitted is not None:
+        stories = (s for s in stories if s["url"].rstrip("/") not in emitted)
+    unique = dedupe_by_key(stories, lambda s: s["url"].rstrip("/"))
 
     print(f"\nTotal unique stories: {len(unique)}", file=sys.stderr)
 
@@ -277,6 +273,11 @@ def main():
     else:
         print(format_markdown(unique, args.hours))
 
+    if emitted is not None:
+        for s in unique:
+            emitted.add(s["url"].rstrip("/"))
+        emitted.save()
+
 
 if __name__ == "__main__":
     main()